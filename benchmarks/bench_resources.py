@@ -0,0 +1,113 @@
+"""Time Whisper + llama.cpp on the sample mayday recording under each thread mode.
+
+Every mode runs in fresh processes because torch thread settings are process-wide.
+`--colocated N` starts N processes at once, the deployment where unbounded thread pools
+oversubscribe the machine, and reports the slowest process and the combined throughput:
+
+    poetry run python benchmarks/bench_resources.py --modes off auto --runs 3 --colocated 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SAMPLE_AUDIO = "tests/data/38382-20230617-2339.mp3"
+
+
+def run_mode(mode: str, runs: int, colocated: int, slot: int) -> dict:
+    import whisper
+
+    from vhf_watch.analyzer.llm_analyzer import analyze_transcript
+    from vhf_watch.config import FULL_LLAMA_CPP_BINARY, WHISPER_MODEL
+    from vhf_watch.resources import apply_plan, plan_resources
+
+    apply_plan(plan_resources(mode=mode, colocated=colocated, slot=slot))
+    model = whisper.load_model(WHISPER_MODEL)
+    model.transcribe(SAMPLE_AUDIO)  # warm-up
+
+    asr, llm = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        transcript = model.transcribe(SAMPLE_AUDIO).get("text", "")
+        asr.append(time.perf_counter() - start)
+
+        if os.path.exists(FULL_LLAMA_CPP_BINARY):
+            start = time.perf_counter()
+            analyze_transcript(transcript)
+            llm.append(time.perf_counter() - start)
+
+    return {
+        "mode": mode,
+        "asr_s": min(asr),
+        "llm_s": min(llm) if llm else None,
+    }
+
+
+def run_colocated(mode: str, runs: int, colocated: int) -> dict:
+    """Run `colocated` children side by side and combine their timings."""
+    start = time.perf_counter()
+    children = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                __file__,
+                "--child",
+                mode,
+                "--runs",
+                str(runs),
+                "--colocated",
+                str(colocated),
+                "--slot",
+                str(slot),
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for slot in range(colocated)
+    ]
+    results = []
+    for child in children:
+        out, _ = child.communicate()
+        if child.returncode != 0:
+            raise RuntimeError(f"Benchmark child for mode {mode} exited with {child.returncode}")
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    wall = time.perf_counter() - start
+
+    llm = [r["llm_s"] for r in results if r["llm_s"] is not None]
+    return {
+        "mode": mode,
+        "asr_s": max(r["asr_s"] for r in results),
+        "llm_s": max(llm) if llm else None,
+        "transcripts_per_min": colocated * (runs + 1) * 60 / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["off", "auto"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--colocated", type=int, default=1, help="Processes to run at once")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--slot", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args.runs, args.colocated, args.slot)))
+        return
+
+    print(f"{args.colocated} process(es) per mode; timings are the slowest process")
+    print(f"{'mode':<8} {'whisper (s)':>12} {'llama (s)':>10} {'transcripts/min':>16}")
+    for mode in args.modes:
+        result = run_colocated(mode, args.runs, args.colocated)
+        llm = f"{result['llm_s']:.2f}" if result["llm_s"] is not None else "n/a"
+        print(
+            f"{mode:<8} {result['asr_s']:>12.2f} {llm:>10} "
+            f"{result['transcripts_per_min']:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
+import json
+import os
+
+from vhf_watch.analyzer import llm_analyzer
 from vhf_watch.analyzer.llm_analyzer import analyze_transcript
 
 
@@ -5,6 +9,7 @@ def test_analyze_with_llm_mock(monkeypatch):
     def fake_run(*args, **kwargs):
         class Result:
             stdout = '{"call_for_help": true, "location": "Zakynthos"}'
+            stderr = ""
 
         return Result()
 
@@ -12,3 +17,60 @@ def test_analyze_with_llm_mock(monkeypatch):
     output = analyze_transcript("Mayday, this is Sea Spirit near Zakynthos.")
     assert output["call_for_help"] is True
     assert "Zakynthos" in output["location"]
+
+
+def test_analyze_parses_json_after_banner_and_counts_tokens(monkeypatch):
+    def fake_run(cmd, **kwargs):
+        assert "--grammar" in cmd
+
+        class Result:
+            stdout = (
+                "main: build = 1 (abc)\n"
+                '{"call_for_help":true,"keywords":["mayday"],"location":null,'
+                '"time":null,"actors":["Sea Spirit"]} [end of text]'
+            )
+            stderr = "llama_perf_context_print:        eval time =  512.00 ms /    42 runs"
+
+        return Result()
+
+    monkeypatch.setattr("subprocess.run", fake_run)
+    monkeypatch.setattr(llm_analyzer, "stats", llm_analyzer.AnalyzerStats())
+    output = analyze_transcript("Mayday, mayday, this is Sea Spirit.")
+    assert output["actors"] == ["Sea Spirit"]
+    assert llm_analyzer.stats.parse_rate == 1.0
+    assert llm_analyzer.stats.tokens_per_event == 42
+
+
+def test_token_cap_fits_longest_schema_object():
+    longest = {
+        "call_for_help": False,
+        "keywords": ["k" * llm_analyzer.MAX_STR_CHARS] * llm_analyzer.MAX_LIST_ITEMS,
+        "location": "l" * llm_analyzer.MAX_STR_CHARS,
+        "time": "t" * llm_analyzer.MAX_STR_CHARS,
+        "actors": ["a" * llm_analyzer.MAX_STR_CHARS] * llm_analyzer.MAX_LIST_ITEMS,
+    }
+    assert len(json.dumps(longest, separators=(",", ":"))) <= llm_analyzer.MAX_TOKENS
+    assert str(os.getpid()) in llm_analyzer.prompt_cache_path()
+
+
+def test_fallback_has_the_llm_schema(monkeypatch):
+    def failing_run(*args, **kwargs):
+        raise FileNotFoundError("llama-cli")
+
+    def fake_run(*args, **kwargs):
+        class Result:
+            stdout = '{"call_for_help": true}'
+            stderr = ""
+
+        return Result()
+
+    monkeypatch.setattr(llm_analyzer, "stats", llm_analyzer.AnalyzerStats())
+    monkeypatch.setattr("subprocess.run", failing_run)
+    fallback = analyze_transcript("Mayday, Libyan coast guard, we need rescue.")
+    monkeypatch.setattr("subprocess.run", fake_run)
+    parsed = analyze_transcript("Mayday.")
+
+    assert fallback.keys() == parsed.keys()
+    assert fallback["llm_fallback"] is True and parsed["llm_fallback"] is False
+    assert fallback["location"] is None and fallback["actors"] == []
+    assert llm_analyzer.stats.summary() == "LLM parse rate 50% over 2 calls, 0.0 tokens/event"
@@ -0,0 +1,242 @@
+import datetime
+import json
+import shutil
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from vhf_watch.analyzer.correlator import EventCorrelator
+from vhf_watch.broker.tasks import decode_segment, encode_segment, run_event_writer, run_worker
+from vhf_watch.broker.transport import (
+    DEAD_LETTER_QUEUE,
+    SEGMENT_QUEUE,
+    SpoolBroker,
+    connect_broker,
+    result_queue,
+)
+from vhf_watch.config import BROKER_URL
+
+
+def fake_llm(monkeypatch):
+    def fake_run(*args, **kwargs):
+        class Result:
+            stdout = '{"call_for_help": true, "location": "Zakynthos"}'
+            stderr = ""
+
+        return Result()
+
+    monkeypatch.setattr("subprocess.run", fake_run)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_connect_broker_urls(tmp_path):
+    assert connect_broker(BROKER_URL).root == "broker_spool"
+    assert connect_broker(f"spool://{tmp_path}").root == str(tmp_path)
+    assert connect_broker("spool://relative/dir").root == "relative/dir"
+
+
+def test_spool_broker_fifo_and_ack(tmp_path):
+    broker = SpoolBroker(str(tmp_path))
+
+    broker.put("segments", b"1")
+    broker.put("segments", b"2")
+    first = broker.get("segments")
+    second = broker.get("segments")
+    assert (first.data, second.data) == (b"1", b"2")
+    assert broker.get("segments", timeout=0) is None
+
+    broker.ack("segments", first)
+    broker.ack("segments", second)
+    assert broker.requeue_expired("segments", lease_seconds=0) == 0
+
+
+def test_unacked_message_is_redelivered_after_lease(tmp_path):
+    broker = SpoolBroker(str(tmp_path))
+    broker.put("segments", b"mayday")
+    assert broker.get("segments").data == b"mayday"
+
+    assert broker.requeue_expired("segments", lease_seconds=60) == 0
+    assert broker.requeue_expired("segments", lease_seconds=-1) == 1
+    assert broker.get("segments", timeout=0).data == b"mayday"
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+def test_segment_is_compressed():
+    noise = np.random.default_rng(0).integers(-8000, 8000, 160000).astype(np.int16)
+    data = encode_segment(
+        "ws://radio", 0, datetime.datetime(2025, 4, 13), noise.tobytes(), result_queue("a")
+    )
+    header, audio = decode_segment(data)
+    assert header["reply_to"] == "results-a"
+    assert len(data) < len(noise.tobytes()) / 4
+
+
+def test_worker_replies_to_the_ingest_node(tmp_path, monkeypatch):
+    fake_llm(monkeypatch)
+
+    class FakeTranscriber:
+        def transcribe_chunk(self, path):
+            return "Mayday, this is Sea Spirit near Zakynthos."
+
+    broker = SpoolBroker(str(tmp_path), poll_interval=0.01)
+    header = {
+        "id": "ws://radio@640",
+        "source": "ws://radio",
+        "offset": 640,
+        "timestamp": "2025-04-13T10:42:31",
+        "reply_to": result_queue("node-a"),
+    }
+    broker.put(SEGMENT_QUEUE, json.dumps(header).encode() + b"\n" + b"OggS...")
+
+    stop_event = threading.Event()
+    worker = threading.Thread(target=run_worker, args=(broker, FakeTranscriber(), stop_event))
+    worker.start()
+    inflight = tmp_path / ".inflight" / SEGMENT_QUEUE
+    wait_until(lambda: inflight.exists() and not any(inflight.iterdir()))
+    stop_event.set()
+    worker.join()
+
+    assert broker.get(result_queue("node-b"), timeout=0) is None
+    result = json.loads(broker.get(result_queue("node-a"), timeout=0).data)
+    assert result["id"] == "ws://radio@640"
+    assert result["llm_output"]["location"] == "Zakynthos"
+
+
+def test_event_writer_skips_redelivered_results(tmp_path):
+    broker = SpoolBroker(str(tmp_path / "spool"), poll_interval=0.01)
+    log_path = tmp_path / "log.jsonl"
+    result = {
+        "id": "ws://radio@0",
+        "source": "ws://radio",
+        "offset": 0,
+        "timestamp": "2025-04-13T10:42:31",
+        "transcription": "Mayday",
+        "llm_output": {"call_for_help": True},
+    }
+    broker.put(result_queue("node-a"), json.dumps(result).encode())
+    broker.put(result_queue("node-a"), json.dumps(result).encode())
+
+    stop_event = threading.Event()
+    writer = threading.Thread(
+        target=run_event_writer,
+        args=(broker, "node-a", str(log_path), stop_event, EventCorrelator()),
+    )
+    writer.start()
+    inflight = tmp_path / "spool" / ".inflight" / result_queue("node-a")
+    queue_dir = tmp_path / "spool" / result_queue("node-a")
+    wait_until(
+        lambda: inflight.exists() and not any(queue_dir.iterdir()) and not any(inflight.iterdir())
+    )
+    stop_event.set()
+    writer.join()
+
+    with open(log_path) as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == 1
+    assert lines[0]["update"] == 1
+    assert lines[0]["fragment"]["transcription"] == "Mayday"
+
+
+def test_worker_parks_malformed_segments_and_keeps_going(tmp_path, monkeypatch):
+    fake_llm(monkeypatch)
+
+    class FakeTranscriber:
+        def transcribe_chunk(self, path):
+            return "Mayday, this is Sea Spirit near Zakynthos."
+
+    broker = SpoolBroker(str(tmp_path), poll_interval=0.01)
+    header = {
+        "id": "ws://radio@0",
+        "source": "ws://radio",
+        "offset": 0,
+        "timestamp": "2025-04-13T10:42:31",
+        "reply_to": result_queue("node-a"),
+    }
+    broker.put(SEGMENT_QUEUE, b"not json\nOggS...")
+    broker.put(SEGMENT_QUEUE, json.dumps(header).encode() + b"\n" + b"OggS...")
+
+    stop_event = threading.Event()
+    worker = threading.Thread(target=run_worker, args=(broker, FakeTranscriber(), stop_event))
+    worker.start()
+    results = tmp_path / result_queue("node-a")
+    wait_until(lambda: results.exists() and any(results.iterdir()))
+    stop_event.set()
+    worker.join()
+
+    assert broker.get(DEAD_LETTER_QUEUE, timeout=0).data == b"not json\nOggS..."
+
+
+def test_failed_segment_stays_leased_for_redelivery(tmp_path):
+    class FailingTranscriber:
+        def __init__(self):
+            self.calls = 0
+
+        def transcribe_chunk(self, path):
+            self.calls += 1
+            raise RuntimeError("CUDA out of memory")
+
+    broker = SpoolBroker(str(tmp_path), poll_interval=0.01)
+    header = {
+        "id": "ws://radio@0",
+        "source": "ws://radio",
+        "offset": 0,
+        "timestamp": "2025-04-13T10:42:31",
+        "reply_to": result_queue("node-a"),
+    }
+    broker.put(SEGMENT_QUEUE, json.dumps(header).encode() + b"\n" + b"OggS...")
+
+    transcriber = FailingTranscriber()
+    stop_event = threading.Event()
+    worker = threading.Thread(target=run_worker, args=(broker, transcriber, stop_event))
+    worker.start()
+    wait_until(lambda: transcriber.calls == 1)
+    stop_event.set()
+    worker.join()
+
+    assert broker.requeue_expired(SEGMENT_QUEUE, lease_seconds=-1) == 1
+
+
+def test_event_writer_survives_malformed_results(tmp_path):
+    broker = SpoolBroker(str(tmp_path / "spool"), poll_interval=0.01)
+    log_path = tmp_path / "log.jsonl"
+    result = {
+        "id": "ws://radio@0",
+        "source": "ws://radio",
+        "offset": 0,
+        "timestamp": "2025-04-13T10:42:31",
+        "transcription": "Mayday",
+        "llm_output": {"call_for_help": True},
+    }
+    broker.put(result_queue("node-a"), b'{"id": "ws://radio@0"}')
+    broker.put(result_queue("node-a"), json.dumps(result).encode())
+
+    stop_event = threading.Event()
+    writer = threading.Thread(
+        target=run_event_writer,
+        args=(broker, "node-a", str(log_path), stop_event, EventCorrelator()),
+    )
+    writer.start()
+    wait_until(lambda: log_path.exists())
+    stop_event.set()
+    writer.join()
+
+    assert broker.get(DEAD_LETTER_QUEUE, timeout=0).data == b'{"id": "ws://radio@0"}'
+    with open(log_path) as f:
+        assert len(f.readlines()) == 1
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+def test_live_segment_ids_include_the_run():
+    pcm = np.zeros(16000, dtype=np.int16).tobytes()
+    timestamp = datetime.datetime(2025, 4, 13)
+    first_run = encode_segment("radio:8073", 0, timestamp, pcm, "results-a", run_id="run1")
+    second_run = encode_segment("radio:8073", 0, timestamp, pcm, "results-a", run_id="run2")
+    assert decode_segment(first_run)[0]["id"] != decode_segment(second_run)[0]["id"]
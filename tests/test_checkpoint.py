@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from vhf_watch.analyzer.correlator import EventCorrelator
+from vhf_watch.broker.tasks import run_event_writer
+from vhf_watch.broker.transport import SpoolBroker, result_queue
+from vhf_watch.logger.checkpoint import Checkpoint
+from vhf_watch.logger.log_writer import log_event
+
+
+def test_resume_from_committed_offset(tmp_path):
+    ckpt_path = str(tmp_path / "checkpoint.json")
+    log_path = str(tmp_path / "log.jsonl")
+
+    checkpoint = Checkpoint(ckpt_path, log_path)
+    checkpoint.load()
+    assert checkpoint.offset("ws://radio") == 0
+
+    log_event(datetime.utcnow(), "Mayday", {"call_for_help": True}, log_path)
+    checkpoint.commit("ws://radio", 320000)
+
+    restored = Checkpoint(ckpt_path, log_path)
+    restored.load()
+    assert restored.offset("ws://radio") == 320000
+    assert restored.offset("ws://other") == 0
+
+
+def test_uncommitted_events_are_dropped_on_restart(tmp_path):
+    ckpt_path = str(tmp_path / "checkpoint.json")
+    log_path = str(tmp_path / "log.jsonl")
+
+    checkpoint = Checkpoint(ckpt_path, log_path)
+    checkpoint.load()
+    log_event(datetime.utcnow(), "first", {}, log_path)
+    checkpoint.commit("ws://radio", 100)
+    # Crash after logging the next chunk but before committing its offset.
+    log_event(datetime.utcnow(), "second", {}, log_path)
+
+    restored = Checkpoint(ckpt_path, log_path)
+    restored.load()
+    assert restored.offset("ws://radio") == 100
+    with open(log_path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [entry["transcription"] for entry in lines] == ["first"]
+
+
+def test_ingest_run_does_not_lose_records_on_standalone_restart(tmp_path):
+    ckpt_path = str(tmp_path / "checkpoint.json")
+    log_path = str(tmp_path / "log.jsonl")
+
+    # Standalone run.
+    checkpoint = Checkpoint(ckpt_path, log_path)
+    checkpoint.load()
+    log_event(datetime.utcnow(), "standalone", {}, log_path)
+    checkpoint.commit("ws://radio", 100)
+
+    # Ingest run: offsets advance while the event writer appends results.
+    broker = SpoolBroker(str(tmp_path / "spool"), poll_interval=0.01)
+    result = {
+        "id": "ws://radio@100",
+        "source": "ws://radio",
+        "offset": 100,
+        "timestamp": "2025-04-13T10:42:31",
+        "transcription": "ingest",
+        "llm_output": {"call_for_help": True},
+    }
+    broker.put(result_queue("node-a"), json.dumps(result).encode())
+    checkpoint = Checkpoint(ckpt_path, log_path)
+    checkpoint.load()
+    checkpoint.commit("ws://radio", 200)
+    stop_event = threading.Event()
+    writer = threading.Thread(
+        target=run_event_writer,
+        args=(broker, "node-a", log_path, stop_event, EventCorrelator(), checkpoint),
+    )
+    writer.start()
+    inflight = tmp_path / "spool" / ".inflight" / result_queue("node-a")
+    deadline = time.monotonic() + 5
+    while not (inflight.exists() and not any(inflight.iterdir())):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    stop_event.set()
+    writer.join()
+
+    # Standalone restart keeps both runs' records.
+    restored = Checkpoint(ckpt_path, log_path)
+    restored.load()
+    assert restored.offset("ws://radio") == 200
+    with open(log_path) as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]["transcription"] == "standalone"
+    assert lines[1]["fragment"]["transcription"] == "ingest"
+
+
+def test_checkpoint_without_log_keeps_stored_log_size(tmp_path):
+    ckpt_path = str(tmp_path / "checkpoint.json")
+    log_path = str(tmp_path / "log.jsonl")
+
+    checkpoint = Checkpoint(ckpt_path, log_path)
+    checkpoint.load()
+    log_event(datetime.utcnow(), "first", {}, log_path)
+    checkpoint.commit("ws://radio", 100)
+
+    offsets_only = Checkpoint(ckpt_path)
+    offsets_only.load()
+    offsets_only.commit("ws://radio", 200)
+
+    restored = Checkpoint(ckpt_path, log_path)
+    restored.load()
+    with open(log_path) as f:
+        assert [json.loads(line)["transcription"] for line in f] == ["first"]
+
+
+def test_kiwi_run_keeps_its_events_and_names_chunks_per_run(tmp_path, monkeypatch):
+    main = pytest.importorskip("vhf_watch.__main__")  # needs whisper, webrtcvad and torch
+    ckpt_path = str(tmp_path / "checkpoint.json")
+    log_path = str(tmp_path / "log.jsonl")
+    monkeypatch.setattr(main, "SAVE_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "LOG_FILE", log_path)
+
+    def fake_run(*args, **kwargs):
+        class Result:
+            stdout = '{"call_for_help": true, "actors": ["Sea Spirit"]}'
+            stderr = ""
+
+        return Result()
+
+    monkeypatch.setattr("subprocess.run", fake_run)
+
+    class FakeKiwi:
+        def iter_audio_chunks(self, hosts, chunk, stop_event):
+            yield "radio:8073", b"\0" * 640
+            yield "radio:8073", b"\0" * 640
+
+        def is_speech_present(self, wav_path):
+            return True
+
+        def transcribe_chunk(self, wav_path):
+            return "Mayday, this is Sea Spirit."
+
+    args = SimpleNamespace(chunk=1, debug=False, node_id="node-a")
+    checkpoint = Checkpoint(ckpt_path, log_path)
+    checkpoint.load()
+    main.kiwi_processing_worker(
+        args, threading.Event(), FakeKiwi(), checkpoint, EventCorrelator(), None
+    )
+
+    chunks = sorted(p.name for p in tmp_path.glob("radio_8073_*.wav"))
+    assert len(chunks) == 2
+    assert all(name.split("_")[2] != "000000000000.wav" for name in chunks)
+
+    # A later websocket run must not truncate the Kiwi events.
+    restored = Checkpoint(ckpt_path, log_path)
+    restored.load()
+    with open(log_path) as f:
+        assert len(f.readlines()) == 2
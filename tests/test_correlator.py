@@ -0,0 +1,137 @@
+import datetime
+
+from vhf_watch.analyzer.correlator import EventCorrelator
+
+T0 = datetime.datetime(2025, 4, 13, 10, 0, 0)
+
+
+def test_fragments_merge_into_one_incident():
+    correlator = EventCorrelator(window_seconds=600)
+
+    first = correlator.observe(
+        T0,
+        "ws://a",
+        "Mayday mayday this is Sea Spirit, three miles south of Zakynthos",
+        {"call_for_help": True, "actors": ["Sea Spirit"], "location": "Zakynthos"},
+    )
+    second = correlator.observe(
+        T0 + datetime.timedelta(seconds=40),
+        "ws://a",
+        "Mayday, we are taking water",
+        {"call_for_help": True},
+    )
+    third = correlator.observe(
+        T0 + datetime.timedelta(seconds=90),
+        "ws://b",
+        "Zakynthos coast guard to sea spirit, proceeding",
+        {"call_for_help": False, "actors": ["sea spirit", "Zakynthos coast guard"]},
+    )
+
+    assert first.incident_id == second.incident_id == third.incident_id
+    assert third.updates == 3
+    assert third.sources == {"ws://a", "ws://b"}
+    assert third.actors == ["Sea Spirit"]
+    assert third.responders == ["Zakynthos coast guard"]
+    assert "position: Zakynthos" in third.summary
+
+
+def test_unrelated_and_expired_events_open_new_incidents():
+    correlator = EventCorrelator(window_seconds=600)
+
+    distress = correlator.observe(T0, "ws://a", "Mayday", {"actors": ["Sea Spirit"]})
+    chatter = correlator.observe(T0, "ws://a", "Radio check", {"call_for_help": False})
+    assert chatter.incident_id != distress.incident_id
+
+    later = correlator.observe(
+        T0 + datetime.timedelta(minutes=30),
+        "ws://a",
+        "Sea Spirit again",
+        {"actors": ["Sea Spirit"]},
+    )
+    assert later.incident_id != distress.incident_id
+    assert distress.incident_id not in correlator.incidents
+    assert list(correlator.incidents) == [later.incident_id]
+
+
+def test_distress_calls_from_different_vessels_stay_separate():
+    correlator = EventCorrelator(window_seconds=600)
+
+    first = correlator.observe(
+        T0,
+        "ws://a",
+        "Mayday Sea Spirit, Zakynthos",
+        {"call_for_help": True, "actors": ["Sea Spirit"], "location": "Zakynthos"},
+    )
+    second = correlator.observe(
+        T0 + datetime.timedelta(seconds=60),
+        "ws://a",
+        "Mayday Blue Star, Malta",
+        {"call_for_help": True, "actors": ["Blue Star"], "location": "Malta"},
+    )
+    unnamed = correlator.observe(
+        T0 + datetime.timedelta(seconds=90),
+        "ws://a",
+        "Mayday mayday, taking water",
+        {"call_for_help": True},
+    )
+
+    assert first.incident_id != second.incident_id
+    assert first.actors == ["Sea Spirit"]
+    assert unnamed.incident_id == second.incident_id
+
+
+def test_out_of_order_results_expire_by_last_seen():
+    correlator = EventCorrelator(window_seconds=600)
+
+    late = correlator.observe(
+        T0 + datetime.timedelta(seconds=100), "ws://a", "Sea Spirit", {"actors": ["Sea Spirit"]}
+    )
+    early = correlator.observe(T0, "ws://b", "Blue Star", {"actors": ["Blue Star"]})
+
+    correlator.observe(T0 + datetime.timedelta(seconds=700), "ws://a", "Radio check", {})
+    assert early.incident_id not in correlator.incidents
+    assert late.incident_id in correlator.incidents
+
+    again = correlator.observe(
+        T0 + datetime.timedelta(seconds=701), "ws://b", "Blue Star", {"actors": ["Blue Star"]}
+    )
+    assert again.incident_id != early.incident_id
+
+
+def test_vessels_sharing_a_responder_stay_separate():
+    correlator = EventCorrelator(window_seconds=600)
+
+    first = correlator.observe(
+        T0,
+        "ws://a",
+        "Mayday, Libyan coast guard, this is Sea Spirit off Zuwara",
+        {
+            "call_for_help": True,
+            "actors": ["Sea Spirit", "Libyan coast guard"],
+            "location": "Zuwara",
+        },
+    )
+    second = correlator.observe(
+        T0 + datetime.timedelta(seconds=60),
+        "ws://b",
+        "Mayday, Libyan coast guard, Frontex, this is Blue Star near Lampedusa",
+        {
+            "call_for_help": True,
+            "actors": ["Blue Star", "Libyan Coast Guard", "Frontex"],
+            "location": "Lampedusa",
+        },
+    )
+
+    assert first.incident_id != second.incident_id
+    assert second.actors == ["Blue Star"]
+    assert second.responders == ["Libyan Coast Guard", "Frontex"]
+
+    # A busy responder alone does not keep the first incident open.
+    correlator.observe(
+        T0 + datetime.timedelta(seconds=500),
+        "ws://b",
+        "Libyan coast guard, all stations",
+        {"actors": ["Libyan coast guard"]},
+    )
+    correlator.observe(T0 + datetime.timedelta(seconds=700), "ws://b", "Radio check", {})
+    assert first.incident_id not in correlator.incidents
@@ -0,0 +1,107 @@
+import struct
+import threading
+
+import numpy as np
+
+from vhf_watch.recorder import kiwi_client
+from vhf_watch.recorder.kiwi_client import (
+    KiwiStream,
+    KiwiStreamPool,
+    parse_snd,
+    resample_pcm,
+    split_host,
+)
+
+
+def snd_frame(samples):
+    header = b"SND" + bytes([0]) + struct.pack("<I", 1) + struct.pack(">H", 0)
+    return header + np.asarray(samples, dtype=">i2").tobytes()
+
+
+class FakeWebSocket:
+    def __init__(self, frames, done: threading.Event):
+        self.frames = list(frames)
+        self.done = done
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def recv(self):
+        if self.frames:
+            return self.frames.pop(0)
+        self.done.wait(1)
+        raise ConnectionError("closed")
+
+    def close(self):
+        pass
+
+
+def test_split_host_and_parse_snd():
+    assert split_host("http://sv8rv.dyndns.org") == ("sv8rv.dyndns.org", 8073)
+    assert split_host("37.10.74.235:8074/") == ("37.10.74.235", 8074)
+    pcm = parse_snd(snd_frame([1, -2, 300])[3:])
+    assert np.frombuffer(pcm, dtype="<i2").tolist() == [1, -2, 300]
+
+
+def test_resample_to_16k():
+    pcm = np.zeros(12000, dtype="<i2").tobytes()
+    assert len(resample_pcm(pcm, 12000)) == 16000 * 2
+
+
+def test_stream_buffers_audio_across_reads():
+    done = threading.Event()
+    frames = [b"MSG audio_rate=12000 sample_rate=12000.000"] + [snd_frame(np.ones(1200))] * 20
+    connections = []
+
+    def connect(url, timeout):
+        ws = FakeWebSocket(frames, done)
+        connections.append(ws)
+        return ws
+
+    stream = KiwiStream("sv8rv.dyndns.org", connect=connect)
+    stream.start()
+    first = stream.read(1, timeout=5)
+    second = stream.read(1, timeout=5)
+    done.set()
+    stream.stop()
+
+    assert len(first) == len(second) == 16000 * 2
+    assert len(connections) == 1
+    assert "SET AR OK in=12000 out=44100" in connections[0].sent
+
+
+def test_failed_host_is_retried_after_backoff(monkeypatch):
+    monkeypatch.setattr(kiwi_client, "KIWI_RETRY_SECONDS", 60)
+
+    stream = KiwiStream("cyp.twrmon.net")
+    stream.mark_failed("refused")
+    assert not stream.available
+    assert stream.read(1, timeout=0) == b""
+
+    stream.retry_at = 0
+    assert stream.available
+
+
+def test_pool_yields_chunks_from_every_host():
+    done = threading.Event()
+    frames = [b"MSG audio_rate=12000 sample_rate=12000.000"] + [snd_frame(np.ones(1200))] * 10
+    urls = []
+
+    def connect(url, timeout):
+        urls.append(url)
+        return FakeWebSocket(frames, done)
+
+    pool = KiwiStreamPool(["http://sv8rv.dyndns.org", "cyp.twrmon.net:8074"], connect=connect)
+    stop_event = threading.Event()
+    seen = {}
+    for host, pcm in pool.iter_chunks(0.5, stop_event):
+        seen.setdefault(host, []).append(len(pcm))
+        if len(seen) == 2 and all(len(chunks) >= 2 for chunks in seen.values()):
+            stop_event.set()
+    done.set()
+    pool.stop()
+
+    assert set(seen) == {"sv8rv.dyndns.org:8073", "cyp.twrmon.net:8074"}
+    assert all(size == 8000 * 2 for chunks in seen.values() for size in chunks)
+    assert len(urls) == 2
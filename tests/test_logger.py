@@ -18,3 +18,9 @@ def test_log_event(tmp_path):
         data = json.loads(lines[0])
         assert data["transcription"] == transcript
         assert json.loads(data["llm_output"])["location"] == "Sea"
+
+
+def test_log_event_reports_failed_write(tmp_path):
+    log_path = tmp_path / "missing" / "log.jsonl"
+
+    assert not log_event(datetime.utcnow(), "Mayday", {"call_for_help": True}, str(log_path))
@@ -0,0 +1,92 @@
+import pytest
+
+from vhf_watch import resources
+from vhf_watch.analyzer import llm_analyzer
+from vhf_watch.resources import ResourcePlan, StagePlan, plan_resources
+
+
+def no_smt(monkeypatch):
+    monkeypatch.setattr(resources, "_physical_core_id", lambda cpu: ("0", str(cpu)))
+
+
+def test_auto_plan_gives_sequential_stages_the_whole_share(monkeypatch):
+    no_smt(monkeypatch)
+    plan = plan_resources(mode="auto", cores=list(range(16)), affinity=False)
+    assert plan.llm.threads == 16
+    assert plan.torch.threads == 16
+    assert plan.torch_interop_threads == 1
+    assert plan.llm.cores is None
+
+
+def test_auto_plan_splits_cores_between_colocated_processes(monkeypatch):
+    no_smt(monkeypatch)
+    plan = plan_resources(mode="auto", cores=list(range(16)), affinity=True, colocated=4, slot=1)
+    assert plan.torch.threads == plan.llm.threads == 4
+    assert plan.torch.cores == plan.llm.cores == [4, 5, 6, 7]
+
+
+def test_auto_plan_sizes_from_physical_cores(monkeypatch):
+    # 8 logical CPUs, 2-way SMT: cpu N and cpu N+4 are siblings on core N % 4.
+    monkeypatch.setattr(resources, "_physical_core_id", lambda cpu: ("0", str(cpu % 4)))
+    plan = plan_resources(mode="auto", cores=list(range(8)), affinity=True)
+    assert plan.torch.threads == plan.llm.threads == 4
+    assert plan.torch.cores == [0, 1, 2, 3]
+
+    plan = plan_resources(mode="auto", cores=list(range(8)), affinity=True, colocated=2, slot=1)
+    assert plan.torch.threads == 2
+    assert plan.torch.cores == [2, 3]
+
+
+def test_manual_plan_and_off():
+    plan = plan_resources(
+        mode="manual", cores=list(range(4)), torch_threads=3, llama_threads=2, affinity=False
+    )
+    assert plan.torch.threads == 3
+    assert plan.llm.threads == 2
+    assert plan.llm.cores is None
+    assert plan_resources(mode="off").llm.threads is None
+    with pytest.raises(ValueError):
+        plan_resources(mode="turbo")
+
+
+def test_llama_threads_flag(monkeypatch):
+    captured = {}
+
+    def fake_run(cmd, **kwargs):
+        captured["cmd"] = cmd
+
+        class Result:
+            stdout = '{"call_for_help": false}'
+            stderr = ""
+
+        return Result()
+
+    monkeypatch.setattr("subprocess.run", fake_run)
+    monkeypatch.setattr(
+        llm_analyzer, "current_plan", lambda: ResourcePlan(mode="manual", llm=StagePlan(6))
+    )
+    llm_analyzer.analyze_transcript("Radio check.")
+    assert captured["cmd"][-2:] == ["-t", "6"]
+
+
+def test_llama_affinity_uses_taskset(monkeypatch):
+    captured = {}
+
+    def fake_run(cmd, **kwargs):
+        captured["cmd"] = cmd
+
+        class Result:
+            stdout = '{"call_for_help": false}'
+            stderr = ""
+
+        return Result()
+
+    monkeypatch.setattr("subprocess.run", fake_run)
+    monkeypatch.setattr(llm_analyzer.shutil, "which", lambda _: "/usr/bin/taskset")
+    monkeypatch.setattr(
+        llm_analyzer,
+        "current_plan",
+        lambda: ResourcePlan(mode="manual", llm=StagePlan(2, cores=[2, 3])),
+    )
+    llm_analyzer.analyze_transcript("Radio check.")
+    assert captured["cmd"][:3] == ["taskset", "-c", "2,3"]
@@ -11,6 +11,7 @@ def test_analyze_with_llm_mock(monkeypatch):
     def fake_run(*args, **kwargs):
         class Result:
             stdout = '{"call_for_help": true, "location": "Zakynthos"}'
+            stderr = ""
 
         return Result()
 
@@ -5,34 +5,37 @@ import random
 import threading
 import time
 import wave
-from typing import Tuple
+from typing import Dict, Optional, Tuple, Union
 
-from vhf_watch.analyzer.llm_analyzer import analyze_transcript
+from vhf_watch.analyzer.correlator import EventCorrelator
+from vhf_watch.analyzer.filters import is_repetitive_junk
+from vhf_watch.analyzer.llm_analyzer import analyze_transcript, log_stats
+from vhf_watch.broker.tasks import push_segment, run_event_writer, run_worker
+from vhf_watch.broker.transport import Broker, connect_broker
 from vhf_watch.cli import parse_args
-from vhf_watch.config import LOG_FILE, WEBSOCKRT_STREAM_URL
-from vhf_watch.logger.log_writer import log_event
+from vhf_watch.config import (
+    CHECKPOINT_FILE,
+    LOG_FILE,
+    SDR_STREAMS,
+    WEBSOCKRT_STREAM_URL,
+    WHISPER_MODEL,
+)
+from vhf_watch.logger.checkpoint import Checkpoint
+from vhf_watch.logger.log_writer import log_incident_update
 from vhf_watch.logger_config import setup_logger
+from vhf_watch.recorder.streamer import Transcriber
 from vhf_watch.recorder.websocket_streamer import WebSocketTranscriber
+from vhf_watch.recorder.whisper_transcriber import WhisperTranscriber
+from vhf_watch.resources import apply_plan, plan_resources
 
 logger = setup_logger(name=__name__)
-transcriber = WebSocketTranscriber()
 audio_queue: queue.Queue[Tuple[datetime.datetime, str]] = queue.Queue()
 
-REPETITION_THRESHOLD = 5  # how many repeated tokens to consider it junk
 SAVE_DIR = "captured_chunks"
 os.makedirs(SAVE_DIR, exist_ok=True)
 
-def is_repetitive_junk(transcript: str) -> bool:
-    tokens = transcript.strip().split()
-    return (
-        len(tokens) > 0 and len(set(tokens)) <= 5 and tokens.count(tokens[0]) > REPETITION_THRESHOLD
-    )
-
-def raw_to_wav(raw_path: str, wav_path: str, sample_rate: int = 16000):
+def raw_to_wav(raw_data: bytes, wav_path: str, sample_rate: int = 16000):
     try:
-        with open(raw_path, 'rb') as raw_file:
-            raw_data = raw_file.read()
-
         with wave.open(wav_path, 'wb') as wav_file:
             wav_file.setnchannels(1)
             wav_file.setsampwidth(2)
@@ -43,64 +46,125 @@ def raw_to_wav(raw_path: str, wav_path: str, sample_rate: int = 16000):
         logger.error(f"Failed to convert raw to wav: {e}")
         return False
 
-def websocket_stream_worker(stream_url: str, stop_event):
+def read_raw_chunk(raw_path: str, offset: int, size: int) -> bytes:
+    """Return `size` bytes starting at `offset`, or b"" if the stream isn't that far yet."""
+    try:
+        if os.path.getsize(raw_path) < offset + size:
+            return b""
+        with open(raw_path, 'rb') as raw_file:
+            raw_file.seek(offset)
+            return raw_file.read(size)
+    except OSError:
+        return b""
+
+def websocket_stream_worker(transcriber: WebSocketTranscriber, stream_url: str, stop_event):
     transcriber.start_stream(stream_url)
     # Audio data is written continuously to transcriber.audio_file
 
-def audio_processing_worker(args, stop_event):
-    while not stop_event.is_set():
-        try:
-            if not os.path.exists(transcriber.audio_file):
-                time.sleep(1)
-                continue
+def process_chunk(
+    args,
+    transcriber: Union[Transcriber, WebSocketTranscriber],
+    source: str,
+    offset: int,
+    raw_data: bytes,
+    wav_path: str,
+    correlator: EventCorrelator,
+    broker: Optional[Broker] = None,
+    run_id: str = "",
+) -> bool:
+    """VAD, then either queue the chunk or transcribe, analyze and log it here.
 
-            timestamp = datetime.datetime.utcnow()
-            raw_path = transcriber.audio_file
-            wav_path = os.path.join(SAVE_DIR, f"{timestamp.strftime('%Y%m%d_%H%M%S')}.wav")
+    Returns False if the chunk or its event could not be written out and should be retried.
+    """
+    timestamp = datetime.datetime.utcnow()
+    if not raw_to_wav(raw_data, wav_path):
+        return False
 
-            if not raw_to_wav(raw_path, wav_path):
-                continue
+    if not transcriber.is_speech_present(wav_path):
+        logger.info("No significant audio detected.")
+    elif broker is not None:
+        push_segment(broker, source, offset, timestamp, raw_data, args.node_id, run_id)
+        logger.info(f"Queued speech segment from {source} at offset {offset}")
+    else:
+        transcript = transcriber.transcribe_chunk(wav_path)
+        if transcript.strip():
+            if is_repetitive_junk(transcript):
+                logger.info(f"Filtered out repetitive numeric junk: {transcript}")
+            else:
+                logger.info(f"Saved non-junk audio to {wav_path}")
 
-            if transcriber.is_speech_present(wav_path):
-                transcript = transcriber.transcribe_chunk(wav_path)
-                if transcript.strip():
-                    if is_repetitive_junk(transcript):
-                        logger.info(f"Filtered out repetitive numeric junk: {transcript}")
-                        continue
+                if args.debug:
+                    logger.debug(f"Transcript: {transcript}")
 
-                    logger.info(f"Saved non-junk audio to {wav_path}")
+                llm_response = analyze_transcript(transcript)
+                logger.info(f"Analysis: {llm_response}")
+                incident = correlator.observe(timestamp, source, transcript, llm_response)
+                logger.info(f"Incident {incident.incident_id}: {incident.summary}")
+                # The checkpoint must not move past a chunk whose event never reached the log.
+                return log_incident_update(
+                    timestamp, incident.to_dict(), source, transcript, llm_response, LOG_FILE
+                )
+        else:
+            logger.info("Whisper returned an empty transcription.")
+    return True
 
-                    if args.debug:
-                        logger.debug(f"Transcript: {transcript}")
+def audio_processing_worker(
+    args,
+    stop_event,
+    transcriber: WebSocketTranscriber,
+    source: str,
+    checkpoint: Checkpoint,
+    correlator: EventCorrelator,
+    broker: Optional[Broker] = None,
+):
+    chunk_bytes = args.chunk * 16000 * 2
+    while not stop_event.is_set():
+        try:
+            offset = checkpoint.offset(source)
+            raw_data = read_raw_chunk(transcriber.audio_file, offset, chunk_bytes)
+            if not raw_data:
+                time.sleep(1)
+                continue
 
-                    llm_response = analyze_transcript(transcript)
-                    logger.info(f"Analysis: {llm_response}")
-                    log_event(timestamp, transcript, llm_response, LOG_FILE)
-                else:
-                    logger.info("Whisper returned an empty transcription.")
-            else:
-                logger.info("No significant audio detected.")
+            # Named by offset so a chunk re-analyzed after a crash overwrites its old capture.
+            wav_path = os.path.join(SAVE_DIR, f"{offset:012d}.wav")
+            if process_chunk(
+                args, transcriber, source, offset, raw_data, wav_path, correlator, broker
+            ):
+                checkpoint.commit(source, offset + len(raw_data))
         except Exception as e:
             logger.error(f"Audio processing error: {e}")
             time.sleep(1)
 
-def main():
-    args = parse_args()
-    logger.info("Starting VHF-Watch with WebSocket stream...")
-    stop_event = threading.Event()
-
-    stream_url = WEBSOCKRT_STREAM_URL 
-
-    stream_thread = threading.Thread(
-        target=websocket_stream_worker, args=(stream_url, stop_event), daemon=True
-    )
-    processing_thread = threading.Thread(
-        target=audio_processing_worker, args=(args, stop_event), daemon=True
-    )
+def kiwi_processing_worker(
+    args,
+    stop_event,
+    transcriber: Transcriber,
+    checkpoint: Checkpoint,
+    correlator: EventCorrelator,
+    broker: Optional[Broker] = None,
+):
+    # Kiwi audio is live, so there is nothing to resume: offsets count from the start of
+    # this run and the run id keeps chunk files and segment ids apart across restarts.
+    run_id = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    offsets: Dict[str, int] = {}
+    for host, pcm in transcriber.iter_audio_chunks(SDR_STREAMS, args.chunk, stop_event):
+        offset = offsets.get(host, 0)
+        offsets[host] = offset + len(pcm)
+        wav_path = os.path.join(SAVE_DIR, f"{host.replace(':', '_')}_{run_id}_{offset:012d}.wav")
+        try:
+            if process_chunk(
+                args, transcriber, host, offset, pcm, wav_path, correlator, broker, run_id
+            ):
+                # No offset to commit; record the log size so a restart keeps these events.
+                checkpoint.commit_log()
+        except Exception as e:
+            logger.error(f"Audio processing error for {host}: {e}")
 
+def run_until_done(args, threads):
     start_time = time.time()
-    stream_thread.start()
-    processing_thread.start()
+    for thread in threads:
+        thread.start()
 
     try:
         while True:
@@ -111,9 +175,86 @@ def main():
     except KeyboardInterrupt:
         logger.info("Interrupted by user.")
 
+def main():
+    args = parse_args()
+    apply_plan(
+        plan_resources(
+            mode=args.threads,
+            torch_threads=args.torch_threads,
+            interop_threads=args.torch_interop_threads,
+            llama_threads=args.llama_threads,
+            affinity=args.cpu_affinity,
+            colocated=args.colocated,
+            slot=args.core_slot,
+        )
+    )
+    stop_event = threading.Event()
+
+    if args.role == "worker":
+        logger.info(f"Starting VHF-Watch worker on {args.broker}...")
+        broker = connect_broker(args.broker)
+        # Segments were already through VAD on the ingest node; workers only need Whisper.
+        asr = WhisperTranscriber(whisper_model=WHISPER_MODEL)
+        worker_thread = threading.Thread(
+            target=run_worker, args=(broker, asr, stop_event), daemon=True
+        )
+        run_until_done(args, [worker_thread])
+        stop_event.set()
+        worker_thread.join()
+        log_stats()
+        return
+
+    broker = connect_broker(args.broker) if args.role == "ingest" else None
+    # Ingest nodes only need VAD; Whisper runs on the workers.
+    whisper_model = None if broker else WHISPER_MODEL
+    correlator = EventCorrelator()
+    # Every role and source appending to LOG_FILE commits its size here, so a restart only
+    # truncates events whose chunk offsets were never committed.
+    checkpoint = Checkpoint(CHECKPOINT_FILE, LOG_FILE)
+    checkpoint.load()
+
+    if args.source == "kiwi":
+        logger.info(f"Starting VHF-Watch with {len(SDR_STREAMS)} KiwiSDR streams...")
+        kiwi_transcriber = Transcriber(whisper_model=whisper_model)
+        threads = [
+            threading.Thread(
+                target=kiwi_processing_worker,
+                args=(args, stop_event, kiwi_transcriber, checkpoint, correlator, broker),
+                daemon=True,
+            )
+        ]
+    else:
+        logger.info("Starting VHF-Watch with WebSocket stream...")
+        stream_url = WEBSOCKRT_STREAM_URL
+        transcriber = WebSocketTranscriber(whisper_model=whisper_model)
+        logger.info(f"Resuming {stream_url} at byte offset {checkpoint.offset(stream_url)}")
+
+        stream_thread = threading.Thread(
+            target=websocket_stream_worker,
+            args=(transcriber, stream_url, stop_event),
+            daemon=True,
+        )
+        processing_thread = threading.Thread(
+            target=audio_processing_worker,
+            args=(args, stop_event, transcriber, stream_url, checkpoint, correlator, broker),
+            daemon=True,
+        )
+        threads = [stream_thread, processing_thread]
+
+    if broker is not None:
+        threads.append(
+            threading.Thread(
+                target=run_event_writer,
+                args=(broker, args.node_id, LOG_FILE, stop_event, correlator, checkpoint),
+                daemon=True,
+            )
+        )
+
+    run_until_done(args, threads)
     stop_event.set()
-    stream_thread.join()
-    processing_thread.join()
+    for thread in threads:
+        thread.join()
+    log_stats()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,180 @@
+import datetime
+import heapq
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from vhf_watch.config import CORRELATION_WINDOW_SECONDS, RESPONDER_STATIONS
+
+RESPONDER_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(name) for name in RESPONDER_STATIONS) + r")\b", re.IGNORECASE
+)
+
+
+def _as_list(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value if v]
+    return [str(value)]
+
+
+def _norm(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def is_responder(actor: str) -> bool:
+    return RESPONDER_RE.search(actor) is not None
+
+
+@dataclass
+class Incident:
+    incident_id: str
+    first_seen: datetime.datetime
+    last_seen: datetime.datetime
+    call_for_help: bool = False
+    sources: Set[str] = field(default_factory=set)
+    actors: List[str] = field(default_factory=list)
+    responders: List[str] = field(default_factory=list)
+    locations: List[str] = field(default_factory=list)
+    times: List[str] = field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)
+    transcripts: List[str] = field(default_factory=list)
+    updates: int = 0
+
+    @property
+    def summary(self) -> str:
+        parts = ["DISTRESS" if self.call_for_help else "Traffic"]
+        if self.actors:
+            parts.append("vessels: " + ", ".join(self.actors))
+        if self.responders:
+            parts.append("responders: " + ", ".join(self.responders))
+        if self.locations:
+            parts.append("position: " + ", ".join(self.locations))
+        if self.times:
+            parts.append("time: " + ", ".join(self.times))
+        parts.append(f"{len(self.transcripts)} transmission(s) from {len(self.sources)} source(s)")
+        return "; ".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "incident_id": self.incident_id,
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+            "call_for_help": self.call_for_help,
+            "sources": sorted(self.sources),
+            "actors": self.actors,
+            "responders": self.responders,
+            "locations": self.locations,
+            "times": self.times,
+            "keywords": self.keywords,
+            "updates": self.updates,
+            "summary": self.summary,
+        }
+
+
+class EventCorrelator:
+    """Merges analyzed fragments into incidents over a sliding time window.
+
+    Incidents are indexed by normalized vessel name and position, across all sources.
+    Responders (see `RESPONDER_STATIONS`) are recorded but not indexed, since one coast
+    guard answering two maydays does not make them the same case. A
+    min-heap of (last_seen, incident_id) drives eviction, so results that arrive out of
+    order (e.g. from parallel workers) still expire by when they were heard; the window
+    is measured against the newest timestamp seen so far. A distress fragment with no name
+    or position joins the latest open distress incident on the same source. Not
+    thread-safe; feed it from a single thread.
+    """
+
+    def __init__(self, window_seconds: int = CORRELATION_WINDOW_SECONDS):
+        self.window = datetime.timedelta(seconds=window_seconds)
+        self.incidents: Dict[str, Incident] = {}
+        self.expiry: List[Tuple[datetime.datetime, str]] = []
+        self.latest: Optional[datetime.datetime] = None
+        self.by_actor: Dict[str, str] = {}
+        self.by_location: Dict[str, str] = {}
+        self.last_distress_by_source: Dict[str, str] = {}
+        self._counter = 0
+
+    def observe(
+        self, timestamp: datetime.datetime, source: str, transcript: str, analysis: dict
+    ) -> Incident:
+        self.latest = timestamp if self.latest is None else max(self.latest, timestamp)
+        self.evict(self.latest)
+
+        actors = _as_list(analysis.get("actors"))
+        responders = [a for a in actors if is_responder(a)]
+        actors = [a for a in actors if not is_responder(a)]
+        locations = _as_list(analysis.get("location"))
+        call_for_help = bool(analysis.get("call_for_help"))
+
+        incident = self._match(source, actors, locations, call_for_help)
+        if incident is None:
+            self._counter += 1
+            incident_id = f"{timestamp.strftime('%Y%m%dT%H%M%S')}-{self._counter}"
+            incident = Incident(incident_id=incident_id, first_seen=timestamp, last_seen=timestamp)
+            self.incidents[incident_id] = incident
+
+        incident.last_seen = max(incident.last_seen, timestamp)
+        incident.call_for_help = incident.call_for_help or call_for_help
+        incident.sources.add(source)
+        incident.transcripts.append(transcript)
+        incident.updates += 1
+        self._merge(incident.actors, actors, self.by_actor, incident.incident_id)
+        self._merge(incident.responders, responders)
+        self._merge(incident.locations, locations, self.by_location, incident.incident_id)
+        self._merge(incident.times, _as_list(analysis.get("time")))
+        self._merge(incident.keywords, _as_list(analysis.get("keywords")))
+        if incident.call_for_help:
+            self.last_distress_by_source[source] = incident.incident_id
+
+        heapq.heappush(self.expiry, (incident.last_seen, incident.incident_id))
+        return incident
+
+    def evict(self, now: datetime.datetime) -> None:
+        while self.expiry and now - self.expiry[0][0] > self.window:
+            last_seen, incident_id = heapq.heappop(self.expiry)
+            incident = self.incidents.get(incident_id)
+            if incident is None or incident.last_seen != last_seen:
+                continue  # evicted already, or a newer entry for it is still in the heap
+            del self.incidents[incident_id]
+            for index, keys in [
+                (self.by_actor, map(_norm, incident.actors)),
+                (self.by_location, map(_norm, incident.locations)),
+                (self.last_distress_by_source, incident.sources),
+            ]:
+                for key in keys:
+                    if index.get(key) == incident_id:
+                        del index[key]
+
+    def _match(
+        self, source: str, actors: List[str], locations: List[str], call_for_help: bool
+    ) -> Optional[Incident]:
+        candidates = [self.by_actor.get(_norm(a)) for a in actors]
+        candidates += [self.by_location.get(_norm(loc)) for loc in locations]
+        for incident_id in candidates:
+            if incident_id is not None:
+                return self.incidents[incident_id]
+        if actors or locations:
+            return None  # names a vessel or position of its own: a different case
+        if call_for_help and source in self.last_distress_by_source:
+            return self.incidents[self.last_distress_by_source[source]]
+        return None
+
+    @staticmethod
+    def _merge(
+        values: List[str],
+        new_values: List[str],
+        index: Optional[Dict[str, str]] = None,
+        incident_id: str = "",
+    ) -> None:
+        known = {_norm(v) for v in values}
+        for value in new_values:
+            key = _norm(value)
+            if index is not None:
+                index[key] = incident_id
+            if key not in known:
+                known.add(key)
+                values.append(value)
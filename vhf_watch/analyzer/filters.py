@@ -0,0 +1,8 @@
+REPETITION_THRESHOLD = 5  # how many repeated tokens to consider it junk
+
+
+def is_repetitive_junk(transcript: str) -> bool:
+    tokens = transcript.strip().split()
+    return (
+        len(tokens) > 0 and len(set(tokens)) <= 5 and tokens.count(tokens[0]) > REPETITION_THRESHOLD
+    )
@@ -1,31 +1,133 @@
+import atexit
+import copy
 import json
+import os
 import re
+import shutil
 import subprocess
+from dataclasses import dataclass
+from typing import Optional
 
-from vhf_watch.config import FULL_LLAMA_CPP_BINARY, FULL_MODEL_PATH
+from vhf_watch.config import FULL_LLAMA_CPP_BINARY, FULL_MODEL_PATH, LLAMA_PROMPT_CACHE
 from vhf_watch.logger_config import setup_logger
+from vhf_watch.resources import current_plan
 
 logger = setup_logger(name=__name__)
 
 FALLBACK_KEYWORDS = ["mayday", "help", "rescue", "libyan coast guard", "frontex"]
 
+# The transcript goes last so llama.cpp can reuse the cached KV state of this fixed prefix.
+PROMPT_PREFIX = (
+    "[INST] You monitor marine VHF distress traffic. Read the radio transcript and answer "
+    "with JSON only: call_for_help (true if anyone asks for help or rescue, or says mayday), "
+    'keywords (mentions of "Libyan coast guard", "Frontex", "rescue", "mayday"), '
+    "location and time (as said, or null), actors (ship names, coast guards). [/INST]\n"
+    "TRANSCRIPT: "
+)
+
+MAX_STR_CHARS = 24
+MAX_LIST_ITEMS = 3
+
+# GBNF grammar for the distress schema. Strings are printable ASCII without quotes or
+# backslashes, so every character is at most one token and the bounds below give a hard
+# limit on the output length.
+DISTRESS_GRAMMAR = rf"""
+root  ::= (
+  "{{\"call_for_help\":" bool ",\"keywords\":" list ",\"location\":" nstr
+  ",\"time\":" nstr ",\"actors\":" list "}}"
+)
+bool  ::= "true" | "false"
+list  ::= "[" ( str ( "," str ){{0,{MAX_LIST_ITEMS - 1}}} )? "]"
+nstr  ::= str | "null"
+str   ::= "\"" [ !#-\[\]-~]{{0,{MAX_STR_CHARS}}} "\""
+"""
+
+
+def _longest_output_chars() -> int:
+    string = MAX_STR_CHARS + 2
+    items = 2 + MAX_LIST_ITEMS * string + (MAX_LIST_ITEMS - 1)
+    skeleton = len('{"call_for_help":false,"keywords":,"location":,"time":,"actors":}')
+    return skeleton + 2 * items + 2 * max(string, len("null"))
+
+
+# One token per character is the worst case, so -n never truncates a valid object.
+MAX_TOKENS = _longest_output_chars()
+
+SCHEMA_DEFAULTS = {
+    "call_for_help": False,
+    "keywords": [],
+    "location": None,
+    "time": None,
+    "actors": [],
+}
+
+STATS_LOG_EVERY = 50  # calls between parse-rate reports at info level
+
+GENERATED_TOKENS_RE = re.compile(r"(?<!prompt )eval time =\s*[\d.]+ ms /\s*(\d+) (?:runs|tokens)")
+
+
+@dataclass
+class AnalyzerStats:
+    calls: int = 0
+    parsed: int = 0
+    tokens: int = 0
+
+    @property
+    def parse_rate(self) -> float:
+        return self.parsed / self.calls if self.calls else 0.0
+
+    @property
+    def tokens_per_event(self) -> float:
+        return self.tokens / self.parsed if self.parsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"LLM parse rate {self.parse_rate:.0%} over {self.calls} calls, "
+            f"{self.tokens_per_event:.1f} tokens/event"
+        )
 
-def analyze_transcript(transcript: str) -> dict:
-    prompt = f"""
-        You are monitoring marine distress communications. Analyze the following radio transcript.
 
-        TRANSCRIPT:
-        "{transcript}"
+stats = AnalyzerStats()
+_prompt_cache: Optional[str] = None
 
-        Extract:
-        - Calls for help
-        - Mentions of "Libyan coast guard", "Frontex", or "rescue"
-        - Any time or location mentioned
-        - Any named actors (ship names, coast guards, etc.)
 
-        Return the result in compact JSON format.
-    """
+def parse_llm_output(stdout: str) -> dict:
+    """Decode the first JSON object in llama.cpp's output and fill in missing schema keys."""
+    start = stdout.find("{")
+    if start < 0:
+        raise ValueError("no JSON object in LLM output")
+    parsed, _ = json.JSONDecoder().raw_decode(stdout, start)
+    if not isinstance(parsed, dict):
+        raise ValueError("LLM output is not a JSON object")
+    return {**copy.deepcopy(SCHEMA_DEFAULTS), **parsed}
 
+
+def count_generated_tokens(stderr: str) -> int:
+    match = GENERATED_TOKENS_RE.search(stderr or "")
+    return int(match.group(1)) if match else 0
+
+
+def prompt_cache_path() -> str:
+    """Per-process prompt cache file, so colocated workers don't overwrite each other's."""
+    global _prompt_cache
+    if _prompt_cache is None:
+        stem, ext = os.path.splitext(LLAMA_PROMPT_CACHE)
+        _prompt_cache = f"{stem}.{os.getpid()}{ext}"
+        atexit.register(_remove_prompt_cache, _prompt_cache)
+    return _prompt_cache
+
+
+def _remove_prompt_cache(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def analyze_transcript(transcript: str) -> dict:
+    prompt = PROMPT_PREFIX + json.dumps(transcript.strip()) + "\n"
+
+    stats.calls += 1
     try:
         llama_cmd = [
             str(FULL_LLAMA_CPP_BINARY),
@@ -34,14 +136,41 @@ def analyze_transcript(transcript: str) -> dict:
             "-p",
             prompt,
             "-n",
-            "200",
+            str(MAX_TOKENS),
+            "--grammar",
+            DISTRESS_GRAMMAR,
+            "--prompt-cache",
+            prompt_cache_path(),
+            "--temp",
+            "0",
+            "--no-display-prompt",
+            "-no-cnv",
         ]
 
+        plan = current_plan()
+        if plan.llm.threads:
+            llama_cmd += ["-t", str(plan.llm.threads)]
+        if plan.llm.cores and shutil.which("taskset"):
+            llama_cmd = ["taskset", "-c", ",".join(map(str, plan.llm.cores))] + llama_cmd
+
         result = subprocess.run(llama_cmd, capture_output=True, text=True, timeout=60)
-        return json.loads(result.stdout.strip())
+        analysis = parse_llm_output(result.stdout)
     except Exception as e:
         logger.warning(f"LLM failed, falling back to regex: {e}")
-        return fallback_analysis(transcript)
+        analysis = fallback_analysis(transcript)
+    else:
+        stats.parsed += 1
+        stats.tokens += count_generated_tokens(result.stderr)
+        analysis["llm_fallback"] = False
+
+    if stats.calls % STATS_LOG_EVERY == 0:
+        log_stats()
+    return analysis
+
+
+def log_stats() -> None:
+    if stats.calls:
+        logger.info(stats.summary())
 
 
 def fallback_analysis(transcript: str) -> dict:
@@ -53,6 +182,7 @@ def fallback_analysis(transcript: str) -> dict:
     if detected:
         logger.warning(f"LLM fallback triggered — matched keywords: {detected}")
     return {
+        **copy.deepcopy(SCHEMA_DEFAULTS),
         "call_for_help": any(kw in transcript.lower() for kw in ["mayday", "help", "rescue"]),
         "keywords": detected,
         "llm_fallback": bool(detected),
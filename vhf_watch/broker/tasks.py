@@ -0,0 +1,204 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from pydub import AudioSegment
+
+from vhf_watch.analyzer.correlator import EventCorrelator
+from vhf_watch.analyzer.filters import is_repetitive_junk
+from vhf_watch.analyzer.llm_analyzer import analyze_transcript
+from vhf_watch.broker.transport import (
+    DEAD_LETTER_QUEUE,
+    LEASE_SECONDS,
+    SEGMENT_QUEUE,
+    Broker,
+    Message,
+    result_queue,
+)
+from vhf_watch.logger.checkpoint import Checkpoint
+from vhf_watch.logger.log_writer import log_incident_update
+from vhf_watch.logger_config import setup_logger
+
+logger = setup_logger(name=__name__)
+
+SAMPLE_RATE = 16000
+SEGMENT_BITRATE = "24k"  # Opus speech bitrate; 10 s of 16 kHz PCM is 320 kB raw, ~30 kB here
+RECENT_RESULT_IDS = 10000
+SEGMENT_FIELDS = ("id", "source", "offset", "timestamp", "reply_to")
+RESULT_FIELDS = ("id", "source", "offset", "timestamp", "transcription", "llm_output")
+
+
+def encode_segment(
+    source: str,
+    offset: int,
+    timestamp: datetime.datetime,
+    pcm: bytes,
+    reply_to: str,
+    run_id: str = "",
+) -> bytes:
+    """Frame a speech segment as a JSON header line followed by Ogg/Opus audio.
+
+    Live sources restart their offsets with every run, so they pass a `run_id` to keep
+    segment ids unique across restarts.
+    """
+    audio = AudioSegment(data=pcm, sample_width=2, frame_rate=SAMPLE_RATE, channels=1)
+    buf = io.BytesIO()
+    audio.export(buf, format="ogg", codec="libopus", bitrate=SEGMENT_BITRATE)
+    header = {
+        "id": f"{source}@{run_id}/{offset}" if run_id else f"{source}@{offset}",
+        "source": source,
+        "offset": offset,
+        "timestamp": timestamp.isoformat(),
+        "reply_to": reply_to,
+    }
+    return json.dumps(header).encode("utf-8") + b"\n" + buf.getvalue()
+
+
+def decode_segment(data: bytes) -> Tuple[dict, bytes]:
+    header_line, _, audio = data.partition(b"\n")
+    header = json.loads(header_line)
+    if not isinstance(header, dict) or any(key not in header for key in SEGMENT_FIELDS):
+        raise ValueError("segment header is missing fields")
+    return header, audio
+
+
+def decode_result(data: bytes) -> dict:
+    result = json.loads(data)
+    if not isinstance(result, dict) or any(key not in result for key in RESULT_FIELDS):
+        raise ValueError("result is missing fields")
+    datetime.datetime.fromisoformat(result["timestamp"])
+    return result
+
+
+def push_segment(
+    broker: Broker,
+    source: str,
+    offset: int,
+    timestamp: datetime.datetime,
+    pcm: bytes,
+    node_id: str,
+    run_id: str = "",
+) -> None:
+    data = encode_segment(
+        source, offset, timestamp, pcm, reply_to=result_queue(node_id), run_id=run_id
+    )
+    broker.put(SEGMENT_QUEUE, data)
+
+
+def handle_segment(task: dict, audio: bytes, transcriber) -> Optional[dict]:
+    """Run ASR and LLM analysis for one segment; returns None when there is nothing to log."""
+    fd, ogg_path = tempfile.mkstemp(suffix=".ogg")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        # Whisper decodes (and resamples) the Opus file through ffmpeg itself.
+        transcript = transcriber.transcribe_chunk(ogg_path)
+    finally:
+        os.remove(ogg_path)
+
+    if not transcript.strip():
+        logger.info(f"Whisper returned an empty transcription for {task['id']}.")
+        return None
+    if is_repetitive_junk(transcript):
+        logger.info(f"Filtered out repetitive numeric junk: {transcript}")
+        return None
+
+    return {
+        "id": task["id"],
+        "source": task["source"],
+        "offset": task["offset"],
+        "timestamp": task["timestamp"],
+        "transcription": transcript,
+        "llm_output": analyze_transcript(transcript),
+    }
+
+
+def _park(broker: Broker, queue_name: str, message: Message, error: Exception) -> None:
+    """Move a message that can never be processed to the dead-letter queue."""
+    logger.error(f"Parking malformed message {message.receipt} from {queue_name}: {error}")
+    broker.put(DEAD_LETTER_QUEUE, message.data)
+    broker.ack(queue_name, message)
+
+
+def run_worker(broker: Broker, transcriber, stop_event: threading.Event) -> None:
+    while not stop_event.is_set():
+        try:
+            broker.requeue_expired(SEGMENT_QUEUE, LEASE_SECONDS)
+            message = broker.get(SEGMENT_QUEUE)
+            if message is None:
+                continue
+            try:
+                task, audio = decode_segment(message.data)
+            except ValueError as e:
+                _park(broker, SEGMENT_QUEUE, message, e)
+                continue
+
+            result = handle_segment(task, audio, transcriber)
+            if result is not None:
+                logger.info(f"Analysis for {result['id']}: {result['llm_output']}")
+                broker.put(task["reply_to"], json.dumps(result).encode("utf-8"))
+            # Only acknowledge once the result is queued; a failure or crash before this
+            # re-delivers the segment to a worker when its lease expires.
+            broker.ack(SEGMENT_QUEUE, message)
+        except Exception as e:
+            logger.error(f"Worker error: {e}")
+            time.sleep(1)
+
+
+def run_event_writer(
+    broker: Broker,
+    node_id: str,
+    log_file: str,
+    stop_event: threading.Event,
+    correlator: EventCorrelator,
+    checkpoint: Optional[Checkpoint] = None,
+) -> None:
+    queue_name = result_queue(node_id)
+    # Delivery is at-least-once; redeliveries arrive within a lease period, so remembering
+    # the most recent ids is enough to drop them while this process is running.
+    recent_ids: "OrderedDict[str, None]" = OrderedDict()
+    while not stop_event.is_set():
+        try:
+            broker.requeue_expired(queue_name, LEASE_SECONDS)
+            message = broker.get(queue_name)
+            if message is None:
+                continue
+            try:
+                result = decode_result(message.data)
+            except ValueError as e:
+                _park(broker, queue_name, message, e)
+                continue
+
+            if result["id"] not in recent_ids:
+                timestamp = datetime.datetime.fromisoformat(result["timestamp"])
+                incident = correlator.observe(
+                    timestamp, result["source"], result["transcription"], result["llm_output"]
+                )
+                logger.info(f"Incident {incident.incident_id}: {incident.summary}")
+                if not log_incident_update(
+                    timestamp,
+                    incident.to_dict(),
+                    result["source"],
+                    result["transcription"],
+                    result["llm_output"],
+                    log_file,
+                ):
+                    # Left unacknowledged, the result is delivered again after its lease.
+                    time.sleep(1)
+                    continue
+                if checkpoint is not None:
+                    # Keep a standalone restart from truncating this record as uncommitted.
+                    checkpoint.commit_log()
+                recent_ids[result["id"]] = None
+                if len(recent_ids) > RECENT_RESULT_IDS:
+                    recent_ids.popitem(last=False)
+            broker.ack(queue_name, message)
+        except Exception as e:
+            logger.error(f"Event writer error: {e}")
+            time.sleep(1)
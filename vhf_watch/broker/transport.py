@@ -0,0 +1,187 @@
+import hashlib
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+from vhf_watch.logger_config import setup_logger
+
+logger = setup_logger(name=__name__)
+
+SEGMENT_QUEUE = "segments"
+RESULT_QUEUE_PREFIX = "results-"
+DEAD_LETTER_QUEUE = "dead-letter"  # messages that can never be decoded are parked here
+LEASE_SECONDS = 300  # an unacknowledged message goes back on its queue after this long
+
+
+def result_queue(node_id: str) -> str:
+    """Queue that carries results back to the ingest node `node_id`."""
+    return f"{RESULT_QUEUE_PREFIX}{node_id}"
+
+
+@dataclass
+class Message:
+    receipt: str
+    data: bytes
+
+
+class Broker(ABC):
+    """Byte message queue shared by ingest nodes, workers and the event writer.
+
+    `get` leases a message instead of removing it: it stays in flight until `ack`, and
+    `requeue_expired` puts leases older than `lease_seconds` back on the queue, so a
+    crashed consumer's message is delivered again (at-least-once).
+    """
+
+    @abstractmethod
+    def put(self, queue_name: str, data: bytes) -> None: ...
+
+    @abstractmethod
+    def get(self, queue_name: str, timeout: float = 1.0) -> Optional[Message]: ...
+
+    @abstractmethod
+    def ack(self, queue_name: str, message: Message) -> None: ...
+
+    @abstractmethod
+    def requeue_expired(self, queue_name: str, lease_seconds: float = LEASE_SECONDS) -> int: ...
+
+
+class SpoolBroker(Broker):
+    """Filesystem spool: one directory per queue, one file per message.
+
+    Messages are published with an atomic rename and leased by renaming them into the
+    queue's `.inflight` directory, so several workers can share one spool on a local or
+    network disk.
+    """
+
+    def __init__(self, root: str, poll_interval: float = 0.2):
+        self.root = root
+        self.poll_interval = poll_interval
+
+    def _queue_dir(self, queue_name: str) -> str:
+        path = os.path.join(self.root, queue_name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _inflight_dir(self, queue_name: str) -> str:
+        path = os.path.join(self.root, ".inflight", queue_name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def put(self, queue_name: str, data: bytes) -> None:
+        queue_dir = self._queue_dir(queue_name)
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex}.msg"
+        tmp_path = os.path.join(self.root, f".{name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(queue_dir, name))
+
+    def get(self, queue_name: str, timeout: float = 1.0) -> Optional[Message]:
+        queue_dir = self._queue_dir(queue_name)
+        inflight_dir = self._inflight_dir(queue_name)
+        deadline = time.monotonic() + timeout
+        while True:
+            for name in sorted(os.listdir(queue_dir)):
+                leased = os.path.join(inflight_dir, name)
+                try:
+                    os.rename(os.path.join(queue_dir, name), leased)
+                except FileNotFoundError:
+                    continue  # another consumer got it first
+                try:
+                    os.utime(leased)  # the lease starts now
+                    with open(leased, "rb") as f:
+                        return Message(receipt=name, data=f.read())
+                except FileNotFoundError:
+                    continue  # requeued before the lease was stamped
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def ack(self, queue_name: str, message: Message) -> None:
+        try:
+            os.remove(os.path.join(self._inflight_dir(queue_name), message.receipt))
+        except FileNotFoundError:
+            pass
+
+    def requeue_expired(self, queue_name: str, lease_seconds: float = LEASE_SECONDS) -> int:
+        inflight_dir = self._inflight_dir(queue_name)
+        queue_dir = self._queue_dir(queue_name)
+        cutoff = time.time() - lease_seconds
+        requeued = 0
+        for name in os.listdir(inflight_dir):
+            path = os.path.join(inflight_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.rename(path, os.path.join(queue_dir, name))
+                    requeued += 1
+            except FileNotFoundError:
+                continue
+        return requeued
+
+
+class RedisBroker(Broker):
+    """Redis (or any server speaking its list commands), leasing with BLMOVE.
+
+    Leased messages sit in `<queue>:inflight` with their lease start in `<queue>:leases`.
+    """
+
+    def __init__(self, url: str, prefix: str = "vhf_watch"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, queue_name: str) -> str:
+        return f"{self.prefix}:{queue_name}"
+
+    def put(self, queue_name: str, data: bytes) -> None:
+        self.client.rpush(self._key(queue_name), data)
+
+    def get(self, queue_name: str, timeout: float = 1.0) -> Optional[Message]:
+        key = self._key(queue_name)
+        data = self.client.blmove(key, f"{key}:inflight", max(1, int(timeout)), "LEFT", "RIGHT")
+        if data is None:
+            return None
+        receipt = hashlib.sha1(data).hexdigest()
+        self.client.hset(f"{key}:leases", receipt, time.time())
+        return Message(receipt=receipt, data=data)
+
+    def ack(self, queue_name: str, message: Message) -> None:
+        key = self._key(queue_name)
+        self.client.lrem(f"{key}:inflight", 1, message.data)
+        self.client.hdel(f"{key}:leases", message.receipt)
+
+    def requeue_expired(self, queue_name: str, lease_seconds: float = LEASE_SECONDS) -> int:
+        key = self._key(queue_name)
+        cutoff = time.time() - lease_seconds
+        requeued = 0
+        for data in self.client.lrange(f"{key}:inflight", 0, -1):
+            receipt = hashlib.sha1(data).hexdigest()
+            leased_at = self.client.hget(f"{key}:leases", receipt)
+            if leased_at is None:
+                # Moved by a consumer that has not recorded its lease yet.
+                self.client.hsetnx(f"{key}:leases", receipt, time.time())
+                continue
+            if float(leased_at) >= cutoff:
+                continue
+            if self.client.lrem(f"{key}:inflight", 1, data):
+                self.client.rpush(key, data)
+                self.client.hdel(f"{key}:leases", receipt)
+                requeued += 1
+        return requeued
+
+
+def connect_broker(url: str) -> Broker:
+    """Build a broker from a URL: `spool://dir`, `spool:///abs/dir` or `redis://host:6379/0`."""
+    parsed = urlparse(url)
+    if parsed.scheme in ("spool", "file"):
+        # `spool://broker_spool` puts the directory in netloc, `spool:///srv/x` in path.
+        return SpoolBroker(parsed.netloc + parsed.path)
+    if parsed.scheme == "":
+        return SpoolBroker(url)
+    if parsed.scheme in ("redis", "rediss"):
+        return RedisBroker(url)
+    raise ValueError(f"Unsupported broker URL: {url}")
@@ -1,6 +1,19 @@
 import argparse
+import socket
 
-from vhf_watch.config import CHUNK_SECONDS
+from vhf_watch.config import (
+    AUDIO_SOURCE,
+    BROKER_URL,
+    CHUNK_SECONDS,
+    COLOCATED_PROCESSES,
+    CORE_SLOT,
+    CPU_AFFINITY,
+    LLAMA_THREADS,
+    THREAD_MODE,
+    TORCH_INTEROP_THREADS,
+    TORCH_THREADS,
+)
+from vhf_watch.resources import THREAD_MODES
 
 
 def parse_args():
@@ -20,4 +33,73 @@ def parse_args():
         default=CHUNK_SECONDS,
         help="Chunk length in seconds for audio recording (default: %(default)s)",
     )
+    parser.add_argument(
+        "--source",
+        choices=["websocket", "kiwi"],
+        default=AUDIO_SOURCE,
+        help="Audio input: the OpenWebRX WebSocket stream, or all KiwiSDR hosts in "
+        "SDR_STREAMS in parallel (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--threads",
+        choices=THREAD_MODES,
+        default=THREAD_MODE,
+        help="Thread governor mode: split cores automatically, use the values below, "
+        "or leave library defaults (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--torch-threads",
+        type=int,
+        default=TORCH_THREADS,
+        help="Intra-op threads for Whisper/VAD in manual mode (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--torch-interop-threads",
+        type=int,
+        default=TORCH_INTEROP_THREADS,
+        help="Inter-op threads for torch in manual mode (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--llama-threads",
+        type=int,
+        default=LLAMA_THREADS,
+        help="llama.cpp -t value in manual mode (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cpu-affinity",
+        action=argparse.BooleanOptionalAction,
+        default=CPU_AFFINITY,
+        help="Pin torch and llama.cpp to this process's share of cores (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--colocated",
+        type=int,
+        default=COLOCATED_PROCESSES,
+        help="Number of VHF-Watch processes sharing this machine (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--core-slot",
+        type=int,
+        default=CORE_SLOT,
+        help="Which share of the cores this process uses when colocated (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--role",
+        choices=["standalone", "ingest", "worker"],
+        default="standalone",
+        help="standalone runs everything in one process; ingest captures speech segments, "
+        "queues them and writes results; worker runs Whisper + LLM on queued segments",
+    )
+    parser.add_argument(
+        "--broker",
+        default=BROKER_URL,
+        help="Queue for ingest/worker roles: spool:///dir or redis://host:port/db "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--node-id",
+        default=socket.gethostname(),
+        help="Ingest node name; workers send its results to a queue of its own "
+        "(default: %(default)s)",
+    )
     return parser.parse_args()
@@ -21,3 +21,53 @@ FULL_LLAMA_CPP_BINARY = BASE_DIR / LLAMA_CPP_BINARY
 WHISPER_MODEL = "base"  # Options: "tiny", "base", "small", "medium", "large"
 LOG_FILE = "vhf_watch_log.jsonl"
 CHUNK_SECONDS = 10
+
+# Resource governor: "auto" sizes torch (Whisper/VAD) and llama.cpp from the core count,
+# "manual" uses the values below, "off" leaves every library at its own defaults.
+THREAD_MODE = "auto"
+TORCH_THREADS = 4
+TORCH_INTEROP_THREADS = 1
+LLAMA_THREADS = 4
+CPU_AFFINITY = False
+# Number of vhf_watch processes sharing this machine (e.g. several workers), and which
+# equal share of the cores this one gets.
+COLOCATED_PROCESSES = 1
+CORE_SLOT = 0
+
+CHECKPOINT_FILE = "vhf_watch_checkpoint.json"
+
+# Distributed mode: "spool:///path" (shared directory) or "redis://host:6379/0".
+BROKER_URL = "spool://broker_spool"
+
+# llama.cpp KV cache for the fixed analyzer prompt prefix, reused across calls.
+LLAMA_PROMPT_CACHE = "llama_prompt_cache.bin"
+
+# Fragments that share a vessel or position within this window are merged into one incident.
+CORRELATION_WINDOW_SECONDS = 600
+
+# Actors naming any of these are responders (coast guards, MRCCs, coast stations), not the
+# vessel in distress. They answer many calls, so they are kept on incidents but never used to
+# link fragments.
+RESPONDER_STATIONS = [
+    "coast guard",
+    "coastguard",
+    "frontex",
+    "mrcc",
+    "jrcc",
+    "mrsc",
+    "rescue coordination",
+    "alarm phone",
+    "sea-watch",
+    "navy",
+    "radio",
+]
+
+# Audio input: "websocket" (WEBSOCKRT_STREAM_URL) or "kiwi" (every host in SDR_STREAMS).
+AUDIO_SOURCE = "websocket"
+
+# KiwiSDR streaming: one persistent connection per host in SDR_STREAMS.
+KIWI_PORT = 8073
+KIWI_FREQUENCY_KHZ = 156.800
+KIWI_MODE = "nbfm"
+KIWI_RETRY_SECONDS = 5  # first retry delay after a failure, doubled up to KIWI_RETRY_MAX_SECONDS
+KIWI_RETRY_MAX_SECONDS = 300
@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from vhf_watch.logger_config import setup_logger
+
+logger = setup_logger(name=__name__)
+
+
+class Checkpoint:
+    """Durable per-source stream offsets, committed together with the event log size.
+
+    An offset is only committed after the events for the audio before it are written to
+    the log, so on restart anything logged past the committed log size belongs to audio
+    that will be analyzed again and is truncated away. That keeps the JSONL free of
+    duplicates without scanning it.
+
+    Sizes are kept per log file. Writers whose records are not tied to an offset (the
+    ingest node's event writer, live KiwiSDR capture) call `commit_log` after each append
+    so a later restart never truncates their records. Without a log file only the
+    offsets are tracked and the stored sizes are left as they are.
+    """
+
+    def __init__(self, path: str, log_file: Optional[str] = None):
+        self.path = path
+        self.log_file = log_file
+        self.offsets: Dict[str, int] = {}
+        self.log_sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            state = {}
+
+        self.offsets = {src: int(off) for src, off in state.get("offsets", {}).items()}
+        self.log_sizes = {log: int(size) for log, size in state.get("log_sizes", {}).items()}
+        if self.log_file is not None and self.log_file not in self.log_sizes:
+            self.log_sizes[self.log_file] = self._current_log_size()
+        self._truncate_log()
+
+    def offset(self, source: str) -> int:
+        return self.offsets.get(source, 0)
+
+    def commit(self, source: str, offset: int) -> None:
+        with self._lock:
+            self.offsets[source] = offset
+            if self.log_file is not None:
+                self.log_sizes[self.log_file] = self._current_log_size()
+            self._save()
+
+    def commit_log(self) -> None:
+        """Mark everything appended to the log so far as committed."""
+        if self.log_file is None:
+            return
+        with self._lock:
+            self.log_sizes[self.log_file] = self._current_log_size()
+            self._save()
+
+    def _save(self) -> None:
+        state = {"offsets": self.offsets, "log_sizes": self.log_sizes}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _current_log_size(self) -> int:
+        if self.log_file is None:
+            return 0
+        try:
+            return os.path.getsize(self.log_file)
+        except OSError:
+            return 0
+
+    def _truncate_log(self) -> None:
+        if self.log_file is None:
+            return
+        size = self._current_log_size()
+        committed = self.log_sizes[self.log_file]
+        if size > committed:
+            logger.info(f"Dropping {size - committed} uncommitted bytes from {self.log_file}")
+            with open(self.log_file, "r+b") as f:
+                f.truncate(committed)
@@ -1,15 +1,53 @@
 import json
+import os
 from datetime import datetime
+from typing import Any, Dict
 
+from vhf_watch.logger_config import setup_logger
 
-def log_event(timestamp: datetime, transcript: str, llm_response: str, log_file: str) -> None:
-    log_entry = {
-        "timestamp": timestamp.isoformat(),
-        "transcription": transcript,
-        "llm_output": llm_response,
-    }
+logger = setup_logger(name=__name__)
+
+
+def _append(log_entry: Dict[str, Any], log_file: str) -> bool:
+    """Append and fsync one JSON line; returns False if it did not reach the disk."""
     try:
         with open(log_file, "a", encoding="utf-8") as f:
             f.write(json.dumps(log_entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return True
     except Exception as e:
-        print(f"[ERROR] Failed to write log entry: {e}")
+        logger.error(f"Failed to write log entry to {log_file}: {e}")
+        return False
+
+
+def log_event(timestamp: datetime, transcript: str, llm_response: dict, log_file: str) -> bool:
+    log_entry: Dict[str, Any] = {
+        "timestamp": timestamp.isoformat(),
+        "transcription": transcript,
+        "llm_output": llm_response,
+    }
+    return _append(log_entry, log_file)
+
+
+def log_incident_update(
+    timestamp: datetime,
+    incident: dict,
+    source: str,
+    transcript: str,
+    llm_response: dict,
+    log_file: str,
+) -> bool:
+    """Append one update of an incident; the latest record per `incident_id` is its state."""
+    log_entry: Dict[str, Any] = {
+        "timestamp": timestamp.isoformat(),
+        "incident_id": incident["incident_id"],
+        "update": incident["updates"],
+        "incident": incident,
+        "fragment": {
+            "source": source,
+            "transcription": transcript,
+            "llm_output": llm_response,
+        },
+    }
+    return _append(log_entry, log_file)
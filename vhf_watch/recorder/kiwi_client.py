@@ -0,0 +1,244 @@
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import websocket
+
+from vhf_watch.config import (
+    KIWI_FREQUENCY_KHZ,
+    KIWI_MODE,
+    KIWI_PORT,
+    KIWI_RETRY_MAX_SECONDS,
+    KIWI_RETRY_SECONDS,
+)
+from vhf_watch.logger_config import setup_logger
+
+OUTPUT_RATE = 16000
+KEEPALIVE_SECONDS = 5
+STALL_SECONDS = 10  # reconnect if a connected Kiwi sends no audio for this long
+MAX_BUFFER_SECONDS = 120
+
+
+def split_host(kiwi_host: str) -> Tuple[str, int]:
+    host = re.sub(r"^https?://", "", kiwi_host).split("/")[0]
+    if ":" in host:
+        name, port = host.split(":", 1)
+        return name, int(port)
+    return host, KIWI_PORT
+
+
+def parse_msg(payload: bytes) -> Dict[str, str]:
+    """Parse a Kiwi `MSG key=value key2=value2` frame (tag already stripped)."""
+    params = {}
+    for item in payload.decode("utf-8", errors="replace").split():
+        key, _, value = item.partition("=")
+        params[key] = value
+    return params
+
+
+def parse_snd(payload: bytes) -> bytes:
+    """Return little-endian int16 PCM from an uncompressed Kiwi `SND` frame (tag stripped).
+
+    Layout after the tag: flags (1 byte), sequence (4 bytes), S-meter (2 bytes), then
+    big-endian 16-bit samples.
+    """
+    samples = np.frombuffer(payload[7:], dtype=">i2")
+    return samples.astype("<i2").tobytes()
+
+
+def resample_pcm(pcm: bytes, in_rate: float, out_rate: int = OUTPUT_RATE) -> bytes:
+    samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32)
+    if len(samples) == 0 or in_rate == out_rate:
+        return pcm
+    n_out = int(round(len(samples) * out_rate / in_rate))
+    positions = np.arange(n_out) * (in_rate / out_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype("<i2").tobytes()
+
+
+class KiwiStream:
+    """Persistent audio connection to one KiwiSDR.
+
+    A background thread keeps the websocket open and appends PCM to an in-memory buffer.
+    When the connection fails or stalls the host is taken out of rotation and retried after
+    an exponentially growing delay instead of being dropped for good.
+    """
+
+    def __init__(
+        self,
+        kiwi_host: str,
+        freq_khz: float = KIWI_FREQUENCY_KHZ,
+        mode: str = KIWI_MODE,
+        connect: Callable = websocket.create_connection,
+    ):
+        self.host, self.port = split_host(kiwi_host)
+        self.name = f"{self.host}:{self.port}"
+        self.logger = setup_logger(name=f"{self.__class__.__name__}[{self.name}]")
+        self.freq_khz = freq_khz
+        self.mode = mode
+        self.connect = connect
+
+        self.sample_rate: float = 12000.0
+        self.buffer = bytearray()
+        self.cond = threading.Condition()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+        self.healthy = False
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_audio = 0.0
+
+    def start(self) -> None:
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=KEEPALIVE_SECONDS)
+
+    @property
+    def available(self) -> bool:
+        return self.healthy or time.monotonic() >= self.retry_at
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            delay = self.retry_at - time.monotonic()
+            if delay > 0:
+                self.stop_event.wait(delay)
+                continue
+            try:
+                self.stream()
+            except Exception as e:
+                self.mark_failed(str(e))
+
+    def mark_failed(self, reason: str) -> None:
+        self.healthy = False
+        self.failures += 1
+        backoff = min(KIWI_RETRY_MAX_SECONDS, KIWI_RETRY_SECONDS * 2 ** (self.failures - 1))
+        self.retry_at = time.monotonic() + backoff
+        self.logger.warning(f"KiwiSDR {self.name} failed ({reason}); retrying in {backoff}s")
+
+    def stream(self) -> None:
+        url = f"ws://{self.host}:{self.port}/{int(time.time())}/SND"
+        self.logger.info(f"Connecting to KiwiSDR: {self.name}")
+        ws = self.connect(url, timeout=KEEPALIVE_SECONDS)
+        try:
+            ws.send("SET auth t=kiwi p=")
+            ws.send(f"SET mod={self.mode} low_cut=-4000 high_cut=4000 freq={self.freq_khz:.3f}")
+            ws.send("SET agc=1 hang=0 thresh=-100 slope=6 decay=1000 manGain=50")
+            ws.send("SET squelch=0 max=0")
+            ws.send("SET compression=0")
+
+            self.last_audio = last_keepalive = time.monotonic()
+            while not self.stop_event.is_set():
+                try:
+                    frame = ws.recv()
+                except websocket.WebSocketTimeoutException:
+                    frame = b""
+                self.handle_frame(ws, frame)
+
+                now = time.monotonic()
+                if now - self.last_audio > STALL_SECONDS:
+                    raise TimeoutError(f"no audio for {STALL_SECONDS}s")
+                if now - last_keepalive > KEEPALIVE_SECONDS:
+                    ws.send("SET keepalive")
+                    last_keepalive = now
+        finally:
+            ws.close()
+
+    def handle_frame(self, ws, frame) -> None:
+        if isinstance(frame, str):
+            frame = frame.encode("utf-8")
+        tag, payload = frame[:3], frame[3:]
+        if tag == b"MSG":
+            params = parse_msg(payload)
+            if params.get("too_busy", "0") != "0" or params.get("badp", "0") != "0":
+                raise ConnectionError(f"rejected by Kiwi: {params}")
+            if "audio_rate" in params:
+                ws.send(f"SET AR OK in={params['audio_rate']} out=44100")
+            if "sample_rate" in params:
+                self.sample_rate = float(params["sample_rate"])
+        elif tag == b"SND":
+            pcm = parse_snd(payload)
+            self.last_audio = time.monotonic()
+            if not self.healthy:
+                self.logger.info(f"KiwiSDR {self.name} streaming at {self.sample_rate:.0f} Hz")
+            self.healthy = True
+            self.failures = 0
+            with self.cond:
+                self.buffer.extend(pcm)
+                # Drop the oldest audio if nobody is reading.
+                overflow = len(self.buffer) - int(MAX_BUFFER_SECONDS * self.sample_rate) * 2
+                if overflow > 0:
+                    del self.buffer[:overflow]
+                self.cond.notify_all()
+
+    def read(self, seconds: float, timeout: float) -> bytes:
+        """Block until `seconds` of audio is buffered; returns 16 kHz PCM or b"" on timeout."""
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while True:
+                nbytes = int(seconds * self.sample_rate) * 2
+                if len(self.buffer) >= nbytes:
+                    pcm = bytes(self.buffer[:nbytes])
+                    del self.buffer[:nbytes]
+                    return resample_pcm(pcm, self.sample_rate)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return b""
+                self.cond.wait(remaining)
+
+
+class KiwiStreamPool:
+    """One persistent `KiwiStream` per host, all streaming in parallel."""
+
+    def __init__(self, hosts: Optional[List[str]] = None, **stream_kwargs):
+        self.stream_kwargs = stream_kwargs
+        self.streams: Dict[str, KiwiStream] = {}
+        for host in hosts or []:
+            self.add_host(host)
+
+    def add_host(self, kiwi_host: str) -> KiwiStream:
+        stream = self.get(kiwi_host)
+        if stream is None:
+            stream = KiwiStream(kiwi_host, **self.stream_kwargs)
+            self.streams[stream.name] = stream
+            stream.start()
+        return stream
+
+    def get(self, kiwi_host: str) -> Optional[KiwiStream]:
+        host, port = split_host(kiwi_host)
+        return self.streams.get(f"{host}:{port}")
+
+    def available_hosts(self) -> List[str]:
+        return [name for name, stream in self.streams.items() if stream.available]
+
+    def read_chunk(self, kiwi_host: str, seconds: float, timeout: float) -> bytes:
+        stream = self.add_host(kiwi_host)
+        if not stream.available:
+            return b""
+        return stream.read(seconds, timeout)
+
+    def iter_chunks(
+        self, seconds: float, stop_event: threading.Event
+    ) -> Iterator[Tuple[str, bytes]]:
+        """Yield `(host, pcm)` chunks from every healthy host as they fill up."""
+        while not stop_event.is_set():
+            ready = [s for s in self.streams.values() if s.healthy]
+            if not ready:
+                stop_event.wait(1)
+                continue
+            for stream in ready:
+                pcm = stream.read(seconds, timeout=0)
+                if pcm:
+                    yield stream.name, pcm
+            stop_event.wait(0.1)
+
+    def stop(self) -> None:
+        for stream in self.streams.values():
+            stream.stop()
@@ -1,93 +1,57 @@
-import glob
-import os
 import re
-import shutil
-import socket
 import tempfile
+import threading
 import wave
-from subprocess import CalledProcessError, run
+from typing import Iterator, List, Optional, Tuple
 
 import numpy as np
 import webrtcvad
 import whisper
 
 from vhf_watch.logger_config import setup_logger
+from vhf_watch.recorder.kiwi_client import OUTPUT_RATE, KiwiStreamPool
 from vhf_watch.recorder.speech_detector import SpeechDetector
 
+CONNECT_TIMEOUT = 10  # extra wait for the first chunk while a Kiwi connection comes up
+
 
 class Transcriber:
-    def __init__(self, vad_aggressiveness=3, whisper_model="base"):
+    def __init__(self, vad_aggressiveness=3, whisper_model: Optional[str] = "base"):
         self.logger = setup_logger(name=self.__class__.__name__)
         self.vad = webrtcvad.Vad(vad_aggressiveness)
-        self.model = whisper.load_model(whisper_model)
+        # Ingest nodes only run VAD and pass whisper_model=None to skip loading Whisper.
+        self.model = whisper.load_model(whisper_model) if whisper_model else None
         self.speech_detector = SpeechDetector()
-        self.failed_hosts = set()
+        self.kiwi_pool = KiwiStreamPool()
 
     def sanitize_kiwi_host(self, kiwi_host: str) -> str:
         host = re.sub(r"^https?://", "", kiwi_host)
         return host.split("/")[0]
 
-    def is_kiwi_host_reachable(self, host: str, port: int = 8073, timeout: float = 2.0) -> bool:
-        try:
-            with socket.create_connection((host, port), timeout=timeout):
-                return True
-        except (socket.timeout, ConnectionRefusedError, OSError):
-            return False
-
     def capture_audio_chunk(self, kiwi_host: str, chunk_duration: int) -> str:
         kiwi_host = self.sanitize_kiwi_host(kiwi_host)
-
-        if kiwi_host in self.failed_hosts or not self.is_kiwi_host_reachable(kiwi_host):
-            self.failed_hosts.add(kiwi_host)
-            self.logger.error(f"Kiwi host is not reachable: {kiwi_host}")
+        pcm = self.kiwi_pool.read_chunk(
+            kiwi_host, chunk_duration, timeout=chunk_duration + CONNECT_TIMEOUT
+        )
+        if not pcm:
+            self.logger.error(f"No audio from KiwiSDR: {kiwi_host}")
             return ""
 
-        self.logger.info(f"Connecting to KiwiSDR: {kiwi_host}")
-
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            kiwirecorder_cmd = [
-                "python3",
-                "kiwiclient/kiwirecorder.py",
-                "-s",
-                kiwi_host.split(":")[0],
-                "-p",
-                kiwi_host.split(":")[1] if ":" in kiwi_host else "8073",
-                "-f",
-                "156.800",  #
-                "-m",
-                "nbfm",
-                "-L",
-                "0",
-                "-r",
-                "16000",  # resample
-                "--dir",
-                tmp_dir,
-                "--station",
-                "vhf_watch",
-                "--tlimit",
-                str(chunk_duration),
-            ]
-
-            try:
-                run(kiwirecorder_cmd, stdout=None, stderr=None, check=True)
-                matches = glob.glob(os.path.join(tmp_dir, "*.wav"))
-                if matches:
-                    src_path = matches[0]
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as dst:
-                        shutil.copyfile(src_path, dst.name)
-                        return dst.name
-                else:
-                    self.logger.error("No WAV file generated by kiwirecorder.py")
-                    self.failed_hosts.add(kiwi_host)
-                    return ""
-            except CalledProcessError:
-                self.logger.error(f"kiwirecorder.py error while capturing from {kiwi_host}")
-                self.failed_hosts.add(kiwi_host)
-                return ""
-            except Exception:
-                self.logger.error("Failed to capture audio chunk", exc_info=True)
-                self.failed_hosts.add(kiwi_host)
-                return ""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as dst:
+            with wave.open(dst, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(OUTPUT_RATE)
+                wf.writeframes(pcm)
+            return dst.name
+
+    def iter_audio_chunks(
+        self, kiwi_hosts: List[str], chunk_duration: int, stop_event: threading.Event
+    ) -> Iterator[Tuple[str, bytes]]:
+        """Stream all hosts in parallel and yield `(host, pcm)` chunks as they fill up."""
+        for kiwi_host in kiwi_hosts:
+            self.kiwi_pool.add_host(self.sanitize_kiwi_host(kiwi_host))
+        yield from self.kiwi_pool.iter_chunks(chunk_duration, stop_event)
 
     def is_audio_active(self, wav_path: str, threshold_db: float = -45.0) -> bool:
         try:
@@ -139,6 +103,9 @@ class Transcriber:
             return False
 
     def transcribe_chunk(self, wav_path: str) -> str:
+        if self.model is None:
+            self.logger.error("Whisper is not loaded on this node")
+            return ""
         try:
             result = self.model.transcribe(wav_path)
             return result.get("text", "")
@@ -1,21 +1,24 @@
-import wave
 import json
+import wave
+from typing import Optional, Set
+
 import numpy as np
 import webrtcvad
-import whisper
 import websocket
+import whisper
 
 from vhf_watch.logger_config import setup_logger
 from vhf_watch.recorder.speech_detector import SpeechDetector
 
 
 class WebSocketTranscriber:
-    def __init__(self, vad_aggressiveness=3, whisper_model="base"):
+    def __init__(self, vad_aggressiveness=3, whisper_model: Optional[str] = "base"):
         self.logger = setup_logger(name=self.__class__.__name__)
         self.vad = webrtcvad.Vad(vad_aggressiveness)
-        self.model = whisper.load_model(whisper_model)
+        # Ingest nodes only run VAD and pass whisper_model=None to skip loading Whisper.
+        self.model = whisper.load_model(whisper_model) if whisper_model else None
         self.speech_detector = SpeechDetector()
-        self.failed_hosts = set()
+        self.failed_hosts: Set[str] = set()
         self.audio_file = "radio_audio_stream.raw"
 
     def is_audio_active(self, wav_path: str, threshold_db: float = -45.0) -> bool:
@@ -68,6 +71,9 @@ class WebSocketTranscriber:
             return False
 
     def transcribe_chunk(self, wav_path: str) -> str:
+        if self.model is None:
+            self.logger.error("Whisper is not loaded on this node")
+            return ""
         try:
             result = self.model.transcribe(wav_path)
             return result.get("text", "")
@@ -0,0 +1,19 @@
+import whisper
+
+from vhf_watch.logger_config import setup_logger
+
+
+class WhisperTranscriber:
+    """ASR only, for worker nodes: segments arrive after VAD ran on the ingest node."""
+
+    def __init__(self, whisper_model: str = "base"):
+        self.logger = setup_logger(name=self.__class__.__name__)
+        self.model = whisper.load_model(whisper_model)
+
+    def transcribe_chunk(self, audio_path: str) -> str:
+        try:
+            result = self.model.transcribe(audio_path)
+            return result.get("text", "")
+        except Exception:
+            self.logger.error("Whisper transcription failed", exc_info=True)
+            return ""
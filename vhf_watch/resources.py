@@ -0,0 +1,149 @@
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from vhf_watch.config import (
+    COLOCATED_PROCESSES,
+    CORE_SLOT,
+    CPU_AFFINITY,
+    LLAMA_THREADS,
+    THREAD_MODE,
+    TORCH_INTEROP_THREADS,
+    TORCH_THREADS,
+)
+from vhf_watch.logger_config import setup_logger
+
+logger = setup_logger(name=__name__)
+
+THREAD_MODES = ("auto", "manual", "off")
+
+
+@dataclass
+class StagePlan:
+    threads: Optional[int] = None
+    cores: Optional[List[int]] = None
+
+
+@dataclass
+class ResourcePlan:
+    mode: str = "off"
+    torch: StagePlan = field(default_factory=StagePlan)
+    torch_interop_threads: Optional[int] = None
+    llm: StagePlan = field(default_factory=StagePlan)
+
+
+_current_plan = ResourcePlan()
+
+
+def available_cores() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _physical_core_id(cpu: int) -> Tuple[str, str]:
+    topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+    try:
+        with open(f"{topology}/physical_package_id") as f:
+            package = f.read().strip()
+        with open(f"{topology}/core_id") as f:
+            core = f.read().strip()
+    except OSError:
+        return ("cpu", str(cpu))  # no topology information: count every CPU as a core
+    return (package, core)
+
+
+def physical_cores(cores: List[int]) -> List[int]:
+    """Keep one logical CPU per physical core, dropping SMT siblings."""
+    seen = set()
+    result = []
+    for cpu in cores:
+        core_id = _physical_core_id(cpu)
+        if core_id not in seen:
+            seen.add(core_id)
+            result.append(cpu)
+    return result
+
+
+def core_share(cores: List[int], colocated: int, slot: int) -> List[int]:
+    """Return this process's equal share of `cores` when `colocated` processes share them."""
+    colocated = max(1, min(colocated, len(cores)))
+    share = len(cores) // colocated
+    slot = slot % colocated
+    return cores[slot * share : (slot + 1) * share]
+
+
+def plan_resources(
+    mode: str = THREAD_MODE,
+    cores: Optional[List[int]] = None,
+    torch_threads: int = TORCH_THREADS,
+    interop_threads: int = TORCH_INTEROP_THREADS,
+    llama_threads: int = LLAMA_THREADS,
+    affinity: bool = CPU_AFFINITY,
+    colocated: int = COLOCATED_PROCESSES,
+    slot: int = CORE_SLOT,
+) -> ResourcePlan:
+    if mode not in THREAD_MODES:
+        raise ValueError(f"Unknown thread mode: {mode}")
+    if mode == "off":
+        return ResourcePlan()
+
+    cores = cores if cores is not None else available_cores()
+    if mode == "auto":
+        # torch and llama.cpp both default to one thread per physical core, so size from
+        # physical cores; SMT siblings share execution units and only add contention.
+        # Whisper, VAD and llama.cpp run one after another in a process, so each stage gets
+        # the whole share; colocated processes split the cores and torch's inter-op pool is
+        # reduced to one thread.
+        cores = core_share(physical_cores(cores), colocated, slot)
+        torch_threads = llama_threads = len(cores)
+        interop_threads = 1
+    else:
+        cores = core_share(cores, colocated, slot)
+
+    return ResourcePlan(
+        mode=mode,
+        torch=StagePlan(threads=torch_threads, cores=cores[:torch_threads] if affinity else None),
+        torch_interop_threads=interop_threads,
+        llm=StagePlan(threads=llama_threads, cores=cores[:llama_threads] if affinity else None),
+    )
+
+
+def apply_plan(plan: ResourcePlan) -> None:
+    global _current_plan
+    _current_plan = plan
+    if plan.mode == "off":
+        return
+
+    import torch
+
+    if plan.torch.threads:
+        torch.set_num_threads(plan.torch.threads)
+    if plan.torch_interop_threads:
+        try:
+            torch.set_num_interop_threads(plan.torch_interop_threads)
+        except RuntimeError as e:
+            # Can only be set before torch runs any inter-op parallel work.
+            logger.warning(f"Could not set torch inter-op threads: {e}")
+    if plan.torch.cores:
+        pin_current_process(plan.torch.cores)
+
+    logger.info(
+        f"Resource plan ({plan.mode}): torch={plan.torch.threads} threads "
+        f"(inter-op {plan.torch_interop_threads}), llama={plan.llm.threads} threads, "
+        f"affinity={'on' if plan.torch.cores else 'off'}"
+    )
+
+
+def current_plan() -> ResourcePlan:
+    return _current_plan
+
+
+def pin_current_process(cores: List[int]) -> None:
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("CPU affinity is not supported on this platform")
+        return
+    try:
+        os.sched_setaffinity(0, cores)
+    except OSError as e:
+        logger.warning(f"Failed to set CPU affinity {cores}: {e}")